@@ -0,0 +1,138 @@
+import numpy as np
+from kernels import directAccelerations
+
+MAX_DEPTH = 21
+CHUNK_SIZE = 4096
+
+def spreadBits(values):
+    values = values.astype(np.uint64) & np.uint64(0x00000000FFFFFFFF)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x3333333333333333)
+    values = (values | (values << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return values
+
+def mortonCodes(positions, origin, size, depth):
+    cells = np.floor((positions - origin) / size * (1 << depth)).astype(np.int64)
+    cells = np.clip(cells, 0, (1 << depth) - 1)
+    return spreadBits(cells[:, 0]) | (spreadBits(cells[:, 1]) << np.uint64(1))
+
+class QuadTree:
+    def __init__(self, positions, masses, maxDepth=MAX_DEPTH):
+        origin = positions.min(axis=0)
+        size = float((positions.max(axis=0) - origin).max()) * (1 + 1e-9)
+        if size <= 0:
+            size = 1.0
+        codes = mortonCodes(positions, origin, size, maxDepth)
+        self.order = np.argsort(codes, kind="stable")
+        self.sortedPositions = positions[self.order]
+        self.sortedMasses = masses[self.order]
+        codes = codes[self.order]
+
+        weighted = self.sortedPositions * self.sortedMasses[:, np.newaxis]
+        levels = []
+        for level in range(maxDepth + 1):
+            keys = codes >> np.uint64(2 * (maxDepth - level))
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            ends = np.r_[starts[1:], len(codes)]
+            counts = ends - starts
+            mass = np.add.reduceat(self.sortedMasses, starts)
+            centre = np.add.reduceat(self.sortedPositions, starts) / counts[:, np.newaxis]
+            com = np.add.reduceat(weighted, starts)
+            com = np.divide(com, mass[:, np.newaxis], out=centre, where=mass[:, np.newaxis] > 0)
+            final = level == maxDepth or bool((counts == 1).all())
+            leaf = np.ones(len(starts), dtype=bool) if final else counts == 1
+            levels.append((starts, ends, mass, com, leaf, size / (1 << level)))
+            if final:
+                break
+
+        offsets = np.cumsum([0] + [len(level[0]) for level in levels])
+        self.nodeStart = np.concatenate([level[0] for level in levels])
+        self.nodeEnd = np.concatenate([level[1] for level in levels])
+        self.nodeMass = np.concatenate([level[2] for level in levels])
+        self.nodeCom = np.concatenate([level[3] for level in levels])
+        self.nodeLeaf = np.concatenate([level[4] for level in levels])
+        self.nodeSizeSquared = np.concatenate([np.full(len(level[0]), level[5] ** 2) for level in levels])
+        self.childStart = np.zeros(offsets[-1], dtype=np.int64)
+        self.childCount = np.zeros(offsets[-1], dtype=np.int64)
+        for level in range(len(levels) - 1):
+            parentCount = len(levels[level][0])
+            parents = np.searchsorted(levels[level][0], levels[level + 1][0], side="right") - 1
+            self.childStart[offsets[level]:offsets[level + 1]] = offsets[level + 1] + np.searchsorted(parents, np.arange(parentCount))
+            self.childCount[offsets[level]:offsets[level + 1]] = np.bincount(parents, minlength=parentCount)
+
+    def accelerationsFor(self, ranks, theta):
+        result = np.zeros((len(ranks), 2))
+        potentials = np.zeros(len(ranks))
+        thetaSquared = theta * theta
+        local = np.arange(len(ranks))
+        nodes = np.zeros(len(ranks), dtype=np.int64)
+        while len(nodes):
+            bodies = ranks[local]
+            direction = self.nodeCom[nodes] - self.sortedPositions[bodies]
+            distanceSquared = np.einsum("ij,ij->i", direction, direction)
+            contains = (self.nodeStart[nodes] <= bodies) & (bodies < self.nodeEnd[nodes])
+            accept = self.nodeLeaf[nodes] | (~contains & (self.nodeSizeSquared[nodes] < thetaSquared * distanceSquared))
+
+            far = accept & ~contains
+            self.accumulate(result, potentials, local[far], direction[far], distanceSquared[far], self.nodeMass[nodes[far]])
+
+            near = accept & contains
+            if near.any():
+                counts = self.nodeEnd[nodes[near]] - self.nodeStart[nodes[near]]
+                nearLocal = np.repeat(local[near], counts)
+                others = np.repeat(self.nodeStart[nodes[near]], counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                nearDirection = self.sortedPositions[others] - self.sortedPositions[ranks[nearLocal]]
+                nearDistanceSquared = np.einsum("ij,ij->i", nearDirection, nearDirection)
+                self.accumulate(result, potentials, nearLocal, nearDirection, nearDistanceSquared, self.sortedMasses[others])
+
+            parents = nodes[~accept]
+            counts = self.childCount[parents]
+            local = np.repeat(local[~accept], counts)
+            firstChild = np.repeat(self.childStart[parents], counts)
+            nodes = firstChild + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return result, potentials
+
+    def accumulate(self, result, potentials, local, direction, distanceSquared, mass):
+        valid = distanceSquared > 0
+        inverse = np.zeros_like(mass)
+        inverse[valid] = distanceSquared[valid] ** -0.5
+        weights = mass * inverse * inverse * inverse
+        for axis in range(2):
+            result[:, axis] += np.bincount(local, weights=weights * direction[:, axis], minlength=len(result))
+        potentials -= np.bincount(local, weights=mass * inverse, minlength=len(potentials))
+
+def barnesHutAccelerations(positions, masses, G, theta=0.5, maxDepth=MAX_DEPTH):
+    return barnesHutAccelerationsAndPotentials(positions, masses, G, theta, maxDepth)[0]
+
+def barnesHutAccelerationsAndPotentials(positions, masses, G, theta=0.5, maxDepth=MAX_DEPTH):
+    accelerations = np.zeros((len(positions), 2))
+    potentials = np.zeros(len(positions))
+    if len(positions) < 2:
+        return accelerations, potentials
+    tree = QuadTree(positions, masses, maxDepth)
+    for start in range(0, len(positions), CHUNK_SIZE):
+        ranks = np.arange(start, min(start + CHUNK_SIZE, len(positions)))
+        blockAccelerations, blockPotentials = tree.accelerationsFor(ranks, theta)
+        accelerations[tree.order[ranks]] = G * blockAccelerations
+        potentials[tree.order[ranks]] = G * blockPotentials
+    return accelerations, potentials
+
+def measureAccelerationError(positions, masses, G, theta=0.5, sampleSize=1000, seed=0):
+    approximate = barnesHutAccelerations(positions, masses, G, theta)
+    targets = np.arange(len(positions))
+    if len(targets) > sampleSize:
+        targets = np.sort(np.random.default_rng(seed).choice(targets, sampleSize, replace=False))
+    exact = directAccelerations(positions, masses, G, targets)
+    exactMagnitude = np.linalg.norm(exact, axis=1)
+    error = np.linalg.norm(approximate[targets] - exact, axis=1)
+    relative = np.divide(error, exactMagnitude, out=np.zeros_like(error), where=exactMagnitude > 0)
+    return {
+        "theta": theta,
+        "samples": len(targets),
+        "median": float(np.median(relative)) if len(relative) else 0.0,
+        "p99": float(np.percentile(relative, 99)) if len(relative) else 0.0,
+        "max": float(relative.max()) if len(relative) else 0.0,
+        "rms": float(np.sqrt(np.mean(relative ** 2))) if len(relative) else 0.0,
+    }
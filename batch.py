@@ -0,0 +1,118 @@
+import argparse
+import itertools
+import json
+import time
+import numpy as np
+from parallel import poolContext
+from simulation import Simulation
+
+def applyOverrides(simulation, config):
+    state = simulation.state
+    central = int(np.argmax(state.masses))
+    others = np.arange(len(state.masses)) != central
+    if config["massBody"] is not None:
+        others &= np.array([name == config["massBody"] for name in state.names])
+    state.masses[others] *= config["massScale"]
+    distanceScale = config["distanceScale"]
+    orbiting = np.arange(len(state.masses)) != central
+    # Scale orbits about the central body and keep them circular, v ~ r**-0.5.
+    state.positions[orbiting] = state.positions[central] + (state.positions[orbiting] - state.positions[central]) * distanceScale
+    state.velocities[orbiting] = state.velocities[central] + (state.velocities[orbiting] - state.velocities[central]) / np.sqrt(distanceScale)
+    simulation.forcesStale = True
+
+def orbitalEnergies(simulation):
+    state = simulation.state
+    central = int(np.argmax(state.masses))
+    offsets = state.positions - state.positions[central]
+    relative = state.velocities - state.velocities[central]
+    distances = np.linalg.norm(offsets, axis=1)
+    with np.errstate(divide="ignore"):
+        energies = 0.5 * np.einsum("ij,ij->i", relative, relative) - simulation.G * state.masses[central] / distances
+    energies[central] = -np.inf
+    return energies, distances
+
+def runConfig(config):
+    simulation = Simulation(3, config["G"], vectorized=True, forceSolver=config["forceSolver"], integrator=config["integrator"],
+                            workerCount=config["forceWorkers"])
+    applyOverrides(simulation, config)
+    if not config["vectorized"]:
+        simulation.setVectorized(False)
+    startEnergy = simulation.totalEnergy()
+    startBodies = simulation.bodyAmount
+    simulation.timeStep = config["timeStep"]
+    steps = 0
+    start = time.perf_counter()
+    while simulation.elapsedTime < config["duration"]:
+        remaining = config["duration"] - simulation.elapsedTime
+        simulation.step(min(config["timeStep"], remaining) / simulation.timeStep)
+        steps += 1
+    wallSeconds = time.perf_counter() - start
+    if not simulation.vectorized:
+        simulation.setVectorized(True)
+    energies, distances = orbitalEnergies(simulation)
+    endEnergy = simulation.totalEnergy()
+    extra = {"parallelSpeedup": simulation.measureParallelSpeedup()} if config["forceSolver"] == "parallel" else {}
+    simulation.close()
+    return dict(config, **extra, **{
+        "steps": steps,
+        "wallSeconds": wallSeconds,
+        "stepsPerSecond": steps / wallSeconds if wallSeconds > 0 else float("inf"),
+        "energyDrift": abs((endEnergy - startEnergy) / startEnergy),
+        "bodies": simulation.bodyAmount,
+        "merged": startBodies - simulation.bodyAmount,
+        "ejected": int(np.count_nonzero(energies >= 0)),
+        "maxDistance": float(distances.max()),
+        "stable": bool(startBodies == simulation.bodyAmount and not np.any(energies >= 0)),
+    })
+
+def sweepConfigs(options):
+    keys = ("G", "timeStep", "massScale", "distanceScale")
+    for values in itertools.product(options.G, options.timeStep, options.massScale, options.distanceScale):
+        config = dict(zip(keys, values))
+        config.update({
+            "duration": options.duration,
+            "massBody": options.massBody,
+            "integrator": options.integrator,
+            "forceSolver": options.forceSolver,
+            "forceWorkers": options.workers if options.forceSolver == "parallel" else None,
+            "vectorized": not options.pairwise,
+        })
+        yield config
+
+def runSweep(options):
+    configs = list(sweepConfigs(options))
+    with open(options.output, "w") as file:
+        if options.forceSolver == "parallel":
+            # Each run spreads its force sums over the workers itself, and pool processes can't start pools of their own.
+            writeSummaries(file, map(runConfig, configs))
+        else:
+            with poolContext().Pool(min(options.workers or len(configs), len(configs))) as pool:
+                writeSummaries(file, pool.imap_unordered(runConfig, configs))
+
+def writeSummaries(file, summaries):
+    for summary in summaries:
+        file.write(json.dumps(summary) + "\n")
+        file.flush()
+        speedup = f", {summary['parallelSpeedup']['speedup']:.2f}x parallel speedup" if "parallelSpeedup" in summary else ""
+        print(f"G={summary['G']:.4e} dt={summary['timeStep']:g}s mass x{summary['massScale']:g} "
+              f"distance x{summary['distanceScale']:g}: drift {summary['energyDrift']:.2e}, "
+              f"{summary['merged']} merged, {summary['ejected']} ejected, {summary['stepsPerSecond']:.0f} steps/s{speedup}")
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Headless simulation runs and parameter sweeps")
+    parser.add_argument("--duration", type=float, default=365 * 24 * 60 * 60, help="simulated seconds per run")
+    parser.add_argument("--time-step", dest="timeStep", type=float, nargs="+", default=[24 * 60 * 60], help="seconds per step")
+    parser.add_argument("--G", type=float, nargs="+", default=[6.67430e-11])
+    parser.add_argument("--mass-scale", dest="massScale", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--mass-body", dest="massBody", help="only scale this body's mass (default: every orbiting body)")
+    parser.add_argument("--distance-scale", dest="distanceScale", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--integrator", default="leapfrog")
+    parser.add_argument("--force-solver", dest="forceSolver", default="direct", choices=("direct", "barnesHut", "parallel"))
+    parser.add_argument("--pairwise", action="store_true", help="use the scalar per-body path instead of arrays")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="sweep processes, or force-sum processes per run with --force-solver parallel")
+    parser.add_argument("--output", default="sweep.jsonl")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    runSweep(parseArguments())
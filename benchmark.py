@@ -0,0 +1,209 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+import pygame
+from simulation import Vector2D, Body, Simulation, calculateOrbitalVelocity
+from main import Camera, Renderer
+
+G = 6.67430e-11
+RESOLUTION = Vector2D(1280, 720)
+
+def diskBodies(count, seed=0, bodyRadius=1e6):
+    rng = np.random.default_rng(seed)
+    bodies = [Body(0, 1.989e30, 6.9634e8, (255, 255, 0), "Sun")]
+    distances = rng.uniform(5e10, 5e11, count - 1)
+    angles = rng.uniform(0, 2 * np.pi, count - 1)
+    masses = rng.uniform(1e20, 1e24, count - 1)
+    for i, (distance, angle, mass) in enumerate(zip(distances, angles, masses)):
+        body = Body(0, float(mass), bodyRadius, (150, 150, 150), f"Body {i + 1}")
+        body.position = Vector2D(float(distance * np.cos(angle)), float(distance * np.sin(angle)))
+        body.velocity = calculateOrbitalVelocity(bodies[0], body, G)
+        bodies.append(body)
+    return bodies
+
+def clusterBodies(count, seed=0):
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for i, (x, y) in enumerate(rng.normal(0, 1e8, (count, 2))):
+        body = Body(0, 1e22, 5e6, (150, 150, 150), f"Body {i}")
+        body.position = Vector2D(float(x), float(y))
+        bodies.append(body)
+    return bodies
+
+def createSimulation(bodies, physics, integrator="leapfrog", workerCount=None):
+    solver = physics if physics in ("barnesHut", "parallel") else "direct"
+    simulation = Simulation(3, G, vectorized=physics != "pairwise", forceSolver=solver, integrator=integrator, workerCount=workerCount)
+    simulation.setBodies(bodies)
+    return simulation
+
+def sampleTimes(function, minSeconds, maxSamples, prepare=None):
+    times = []
+    start = time.perf_counter()
+    while len(times) < maxSamples and (not times or time.perf_counter() - start < minSeconds):
+        if prepare is not None:
+            prepare()
+        sampleStart = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - sampleStart)
+    return np.array(times)
+
+def peakMemory(function, samples):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for _ in range(samples):
+        function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def summarise(name, bodyCount, times, peak, extra=None):
+    result = {
+        "name": name,
+        "bodies": bodyCount,
+        "samples": len(times),
+        "perSecond": len(times) / float(times.sum()) if times.sum() > 0 else float("inf"),
+        "p50Ms": float(np.percentile(times, 50) * 1000),
+        "p95Ms": float(np.percentile(times, 95) * 1000),
+        "p99Ms": float(np.percentile(times, 99) * 1000),
+        "peakMemoryBytes": peak,
+    }
+    result.update(extra or {})
+    return result
+
+def benchmarkStep(bodyCount, physics, options):
+    simulation = createSimulation(diskBodies(bodyCount, options.seed), physics, workerCount=options.workers)
+    step = lambda: simulation.step(options.deltaTime)
+    step()
+    startEnergy = simulation.totalEnergy()
+    times = sampleTimes(step, options.minSeconds, options.maxSamples)
+    extra = {"energyDrift": abs((simulation.totalEnergy() - startEnergy) / startEnergy)}
+    peak = peakMemory(step, options.memorySamples)
+    if physics == "parallel":
+        extra["parallel"] = simulation.measureParallelSpeedup()
+        extra["speedup"] = extra["parallel"]["speedup"]
+    simulation.close()
+    return summarise(f"step/{physics}", bodyCount, times, peak, extra)
+
+def benchmarkCollisions(bodyCount, options):
+    simulation = createSimulation(clusterBodies(bodyCount, options.seed), "vectorized")
+    step = lambda: simulation.step(options.deltaTime)
+    times = sampleTimes(step, options.minSeconds, options.maxSamples)
+    merged = bodyCount - len(simulation.bodies)
+    peak = peakMemory(step, options.memorySamples)
+    simulation.close()
+    return summarise("step/collisions", bodyCount, times, peak, {"merged": merged})
+
+def createRenderer(simulation, font):
+    screen = pygame.display.set_mode(RESOLUTION.tuple())
+    camera = Camera(simulation, RESOLUTION)
+    camera.scale = camera.targetScale = 1e-9
+    return Renderer(simulation, camera, screen, RESOLUTION, font)
+
+def benchmarkOrbitLines(bodyCount, font, options):
+    simulation = createSimulation(diskBodies(bodyCount, options.seed), "vectorized")
+    renderer = createRenderer(simulation, font)
+    for body in simulation.bodies:
+        position = body.position
+        for angle in np.linspace(0, 2 * np.pi, body.orbitPoints.maxLength):
+            body.orbitPoints.append(position.x * np.cos(angle), position.x * np.sin(angle))
+    def draw():
+        renderer.camera.position += Vector2D(1e6, 0)
+        for body in simulation.bodies:
+            renderer.drawOrbitLines(body)
+    times = sampleTimes(draw, options.minSeconds, options.maxSamples)
+    peak = peakMemory(draw, options.memorySamples)
+    simulation.close()
+    return summarise("drawOrbitLines/full", bodyCount, times, peak, {"trailLength": simulation.bodies[0].orbitPoints.maxLength})
+
+def benchmarkRender(bodyCount, font, options):
+    simulation = createSimulation(diskBodies(bodyCount, options.seed), "vectorized")
+    renderer = createRenderer(simulation, font)
+    renderer.doOrbitLines = True
+    renderer.doArrows = True
+    # Advance the bodies between samples without timing it, so the figure tracks drawing alone.
+    step = lambda: simulation.step(options.deltaTime)
+    times = sampleTimes(renderer.render, options.minSeconds, options.maxSamples, step)
+    peak = peakMemory(renderer.render, options.memorySamples)
+    simulation.close()
+    return summarise("render", bodyCount, times, peak)
+
+def gitCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def runBenchmarks(options):
+    pygame.init()
+    font = pygame.font.SysFont(None, 24)
+    results = []
+    for bodyCount in options.sizes:
+        for physics in ("pairwise", "vectorized", "barnesHut", "parallel"):
+            if physics == "pairwise" and bodyCount > options.maxPairwise:
+                continue
+            results.append(benchmarkStep(bodyCount, physics, options))
+            print(formatResult(results[-1]))
+    for bodyCount in options.collisionSizes:
+        results.append(benchmarkCollisions(bodyCount, options))
+        print(formatResult(results[-1]))
+    for bodyCount in options.trailSizes:
+        results.append(benchmarkOrbitLines(bodyCount, font, options))
+        print(formatResult(results[-1]))
+    for bodyCount in options.sizes:
+        results.append(benchmarkRender(bodyCount, font, options))
+        print(formatResult(results[-1]))
+    pygame.quit()
+    return {
+        "commit": gitCommit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "results": results,
+    }
+
+def formatResult(result):
+    extras = "".join(f" {key}={result[key]:.3g}" for key in ("energyDrift", "merged", "speedup") if key in result)
+    return (f"{result['name']:<22} N={result['bodies']:<6} {result['perSecond']:9.2f}/s "
+            f"p50={result['p50Ms']:8.2f}ms p95={result['p95Ms']:8.2f}ms p99={result['p99Ms']:8.2f}ms "
+            f"peak={result['peakMemoryBytes'] / 2**20:7.1f}MiB{extras}")
+
+def compareResults(baseline, current):
+    previous = {(result["name"], result["bodies"]): result for result in baseline["results"]}
+    for result in current["results"]:
+        old = previous.get((result["name"], result["bodies"]))
+        if old is not None:
+            ratio = result["perSecond"] / old["perSecond"] if old["perSecond"] > 0 else float("inf")
+            print(f"{result['name']:<22} N={result['bodies']:<6} {ratio:6.2f}x vs {baseline.get('commit') or 'baseline'}")
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the simulation and renderer hot paths")
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--collision-sizes", dest="collisionSizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--trail-sizes", dest="trailSizes", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--max-pairwise", dest="maxPairwise", type=int, default=100)
+    parser.add_argument("--min-seconds", dest="minSeconds", type=float, default=2.0)
+    parser.add_argument("--max-samples", dest="maxSamples", type=int, default=500)
+    parser.add_argument("--memory-samples", dest="memorySamples", type=int, default=3)
+    parser.add_argument("--delta-time", dest="deltaTime", type=float, default=1 / 60)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes for the parallel force solver")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    options = parseArguments()
+    report = runBenchmarks(options)
+    with open(options.output, "w") as file:
+        json.dump(report, file, indent=2)
+    if options.compare:
+        with open(options.compare) as file:
+            compareResults(json.load(file), report)
@@ -0,0 +1,60 @@
+import numpy as np
+
+def findCollisionPairs(positions, radii):
+    bodyCount = len(positions)
+    if bodyCount < 2:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    lows = positions[:, 0] - radii
+    order = np.argsort(lows, kind="stable")
+    sortedLows = lows[order]
+    sortedHighs = (positions[:, 0] + radii)[order]
+    ends = np.searchsorted(sortedLows, sortedHighs, side="right")
+    counts = np.maximum(ends - np.arange(bodyCount) - 1, 0)
+    first = np.repeat(np.arange(bodyCount), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    first = order[first]
+    second = order[second]
+    direction = positions[second] - positions[first]
+    reach = radii[first] + radii[second]
+    hit = np.einsum("ij,ij->i", direction, direction) <= reach ** 2
+    return first[hit], second[hit]
+
+def groupPairs(bodyCount, first, second):
+    labels = np.arange(bodyCount)
+    while True:
+        low = np.minimum(labels[first], labels[second])
+        merged = labels.copy()
+        np.minimum.at(merged, first, low)
+        np.minimum.at(merged, second, low)
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            break
+        labels = merged
+    members = np.unique(np.concatenate([first, second]))
+    groupLabels = labels[members]
+    order = np.argsort(groupLabels, kind="stable")
+    splits = np.flatnonzero(np.diff(groupLabels[order])) + 1
+    return np.split(members[order], splits)
+
+def findCollisionGroups(positions, radii):
+    first, second = findCollisionPairs(positions, radii)
+    if len(first) == 0:
+        return []
+    return groupPairs(len(positions), first, second)
+
+def findEnsembleCollisionGroups(positions, radii, alive):
+    memberCount, bodyCount = alive.shape
+    collisions = []
+    upper = np.triu(np.ones((bodyCount, bodyCount), dtype=bool), 1)
+    blockSize = max(1, (1 << 20) // max(bodyCount * bodyCount, 1))
+    for start in range(0, memberCount, blockSize):
+        block = slice(start, start + blockSize)
+        direction = positions[block, np.newaxis, :, :] - positions[block, :, np.newaxis, :]
+        distanceSquared = np.einsum("eijk,eijk->eij", direction, direction)
+        reach = radii[block, :, np.newaxis] + radii[block, np.newaxis, :]
+        both = alive[block, :, np.newaxis] & alive[block, np.newaxis, :]
+        members, first, second = np.nonzero((distanceSquared <= reach * reach) & both & upper)
+        for member in np.unique(members):
+            inMember = members == member
+            collisions.append((start + int(member), groupPairs(bodyCount, first[inMember], second[inMember])))
+    return collisions
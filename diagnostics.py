@@ -0,0 +1,71 @@
+from collections import deque
+import numpy as np
+
+SECONDS_PER_YEAR = 365.25 * 24 * 60 * 60
+
+class DiagnosticsRecord:
+    __slots__ = ("time", "kinetic", "potential", "energy", "momentum", "angularMomentum",
+                 "energyDrift", "energyDriftRate", "momentumDrift", "angularMomentumDrift", "stepSize")
+
+    def __init__(self, time, kinetic, potential, momentum, angularMomentum, stepSize):
+        self.time = time
+        self.kinetic = kinetic
+        self.potential = potential
+        self.energy = kinetic + potential
+        self.momentum = momentum
+        self.angularMomentum = angularMomentum
+        self.energyDrift = 0.0
+        self.energyDriftRate = 0.0
+        self.momentumDrift = 0.0
+        self.angularMomentumDrift = 0.0
+        self.stepSize = stepSize
+
+class ConservationMonitor:
+    # Thresholds are relative energy drift per simulated year, judged once minSamples records share a baseline.
+    def __init__(self, historyLength=600, driftRateThreshold=1e-5, minSamples=60, autoReduce=False):
+        self.driftRateThreshold = driftRateThreshold
+        self.minSamples = minSamples
+        self.autoReduce = autoReduce
+        self.history = deque(maxlen=historyLength)
+        self.latest = None
+        self.reset()
+
+    def reset(self):
+        self.baseline = None
+        self.history.clear()
+
+    def record(self, time, positions, velocities, masses, potential, stepSize):
+        momenta = velocities * masses[:, np.newaxis]
+        kinetic = 0.5 * float(np.einsum("ij,ij->", momenta, velocities))
+        cross = positions[:, 0] * momenta[:, 1] - positions[:, 1] * momenta[:, 0]
+        return self.recordTotals(time, kinetic, potential, momenta.sum(axis=0), float(cross.sum()),
+                                 float(np.linalg.norm(momenta, axis=1).sum()), float(np.abs(cross).sum()), stepSize)
+
+    # Totals plus the summed per-body magnitudes, for callers that can add them up without building arrays.
+    def recordTotals(self, time, kinetic, potential, momentum, angularMomentum, momentumMagnitude, angularMomentumMagnitude, stepSize):
+        record = DiagnosticsRecord(time, kinetic, potential, momentum, angularMomentum, stepSize)
+        if self.baseline is None:
+            # Momentum of a barycentric system starts near zero, so measure its drift against the total magnitude.
+            self.baseline = record
+            self.momentumScale = max(float(np.linalg.norm(momentum)), momentumMagnitude * 1e-3, 1e-300)
+            self.angularMomentumScale = max(abs(angularMomentum), angularMomentumMagnitude * 1e-3, 1e-300)
+        else:
+            baseline = self.baseline
+            record.energyDrift = abs((record.energy - baseline.energy) / baseline.energy) if baseline.energy != 0 else 0.0
+            span = abs(record.time - baseline.time)
+            record.energyDriftRate = record.energyDrift * SECONDS_PER_YEAR / span if span > 0 else 0.0
+            record.momentumDrift = float(np.linalg.norm(momentum - baseline.momentum)) / self.momentumScale
+            record.angularMomentumDrift = abs(record.angularMomentum - baseline.angularMomentum) / self.angularMomentumScale
+        self.history.append(record)
+        self.latest = record
+        return record
+
+    def exceeded(self):
+        return self.autoReduce and len(self.history) >= self.minSamples and self.latest.energyDriftRate > self.driftRateThreshold
+
+    def relaxable(self):
+        return (self.autoReduce and len(self.history) == self.history.maxlen
+                and self.latest.energyDriftRate < self.driftRateThreshold / 8)
+
+    def maxDrift(self):
+        return max((record.energyDrift for record in self.history), default=0.0)
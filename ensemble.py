@@ -0,0 +1,153 @@
+import argparse
+import json
+import time
+import numpy as np
+from kernels import ensembleAccelerationsAndPotentials
+from collisions import findEnsembleCollisionGroups
+from simulation import Simulation, BodyArrays
+
+class Ensemble:
+    def __init__(self, positions, velocities, masses, radii, G, names=None):
+        self.positions = np.array(positions, dtype=float)
+        self.velocities = np.array(velocities, dtype=float)
+        self.masses = np.array(masses, dtype=float)
+        self.radii = np.array(radii, dtype=float)
+        self.alive = self.masses > 0
+        self.merged = np.zeros(len(self.masses), dtype=np.int64)
+        self.G = G
+        self.names = names
+        self.elapsedTime = 0.0
+        self.accelerations = None
+        self.potentials = None
+        self.forcesStale = True
+        self.startEnergies = self.energies()
+
+    # Member 0 keeps the unperturbed initial conditions and serves as the reference run.
+    @classmethod
+    def fromSimulation(cls, simulation, memberCount, massJitter=0.0, positionJitter=0.0, seed=None):
+        state = simulation.state if simulation.vectorized else BodyArrays(simulation.bodies)
+        rng = np.random.default_rng(seed)
+        bodyCount = len(state.masses)
+        positions = np.repeat(state.positions[np.newaxis], memberCount, axis=0)
+        velocities = np.repeat(state.velocities[np.newaxis], memberCount, axis=0)
+        masses = np.repeat(state.masses[np.newaxis], memberCount, axis=0)
+        radii = np.repeat(state.radii[np.newaxis], memberCount, axis=0)
+        central = int(np.argmax(state.masses))
+        distances = np.linalg.norm(state.positions - state.positions[central], axis=1)
+        masses[1:] *= 1 + massJitter * rng.standard_normal((memberCount - 1, bodyCount))
+        positions[1:] += positionJitter * distances[np.newaxis, :, np.newaxis] * rng.standard_normal((memberCount - 1, bodyCount, 2))
+        return cls(positions, velocities, masses, radii, simulation.G, list(state.names))
+
+    def __len__(self):
+        return len(self.masses)
+
+    def updateAccelerations(self):
+        self.accelerations, self.potentials = ensembleAccelerationsAndPotentials(self.positions, self.masses, self.G)
+        self.forcesStale = False
+
+    def step(self, deltaTime):
+        if self.forcesStale:
+            self.updateAccelerations()
+        self.velocities += self.accelerations * (deltaTime / 2)
+        self.positions += self.velocities * deltaTime
+        self.updateAccelerations()
+        self.velocities += self.accelerations * (deltaTime / 2)
+        self.resolveCollisions()
+        self.elapsedTime += deltaTime
+
+    def resolveCollisions(self):
+        collisions = findEnsembleCollisionGroups(self.positions, self.radii, self.alive)
+        if not collisions:
+            return
+        for member, groups in collisions:
+            for group in groups:
+                self.mergeGroup(member, group)
+        self.updateAccelerations()
+        # Merges are inelastic, so drift is measured again from the post-merge energy.
+        members = [member for member, _ in collisions]
+        self.startEnergies[members] = self.energies()[members]
+
+    def mergeGroup(self, member, group):
+        survivor, absorbed = group[0], group[1:]
+        masses = self.masses[member, group]
+        combinedMass = masses.sum()
+        self.positions[member, survivor] = masses @ self.positions[member, group] / combinedMass
+        self.velocities[member, survivor] = masses @ self.velocities[member, group] / combinedMass
+        self.radii[member, survivor] = np.sqrt(np.sum(self.radii[member, group] ** 2))
+        self.masses[member, survivor] = combinedMass
+        self.masses[member, absorbed] = 0.0
+        self.radii[member, absorbed] = 0.0
+        self.velocities[member, absorbed] = 0.0
+        self.alive[member, absorbed] = False
+        self.merged[member] += len(absorbed)
+
+    def energies(self):
+        if self.forcesStale:
+            self.updateAccelerations()
+        kinetic = 0.5 * np.einsum("en,enk,enk->e", self.masses, self.velocities, self.velocities)
+        return kinetic + 0.5 * np.einsum("en,en->e", self.masses, self.potentials)
+
+    def energyDrift(self):
+        return np.abs((self.energies() - self.startEnergies) / self.startEnergies)
+
+    def divergence(self, reference=0):
+        shared = self.alive & self.alive[reference]
+        offsets = self.positions - self.positions[reference]
+        distances = np.sqrt(np.einsum("enk,enk->en", offsets, offsets)) * shared
+        rms = np.sqrt(np.sum(distances ** 2, axis=1) / np.maximum(shared.sum(axis=1), 1))
+        return rms, distances.max(axis=1)
+
+    def report(self, reference=0):
+        rms, largest = self.divergence(reference)
+        drift = self.energyDrift()
+        return [{
+            "member": member,
+            "divergenceRms": float(rms[member]),
+            "divergenceMax": float(largest[member]),
+            "energyDrift": float(drift[member]),
+            "merged": int(self.merged[member]),
+            "bodies": int(self.alive[member].sum()),
+        } for member in range(len(self))]
+
+def runEnsemble(options):
+    simulation = Simulation(3, options.G, vectorized=True)
+    ensemble = Ensemble.fromSimulation(simulation, options.members, options.massJitter, options.positionJitter, options.seed)
+    simulation.close()
+    samples = []
+    nextSample = 0.0
+    steps = 0
+    start = time.perf_counter()
+    while ensemble.elapsedTime < options.duration:
+        if ensemble.elapsedTime >= nextSample:
+            samples.append((ensemble.elapsedTime, ensemble.divergence()[0]))
+            nextSample += options.sampleInterval
+        ensemble.step(min(options.timeStep, options.duration - ensemble.elapsedTime))
+        steps += 1
+    wallSeconds = time.perf_counter() - start
+    samples.append((ensemble.elapsedTime, ensemble.divergence()[0]))
+    times = [sampleTime for sampleTime, _ in samples]
+    with open(options.output, "w") as file:
+        for summary in ensemble.report():
+            summary["divergenceHistory"] = {"times": times, "rms": [float(rms[summary["member"]]) for _, rms in samples]}
+            file.write(json.dumps(summary) + "\n")
+    rms, _ = ensemble.divergence()
+    print(f"{len(ensemble)} members x {ensemble.masses.shape[1]} bodies, {steps} steps in {wallSeconds:.2f}s "
+          f"({steps * len(ensemble) / wallSeconds:.0f} member-steps/s)")
+    print(f"divergence from reference: median {np.median(rms[1:]):.3e} m, max {rms.max():.3e} m, "
+          f"{int(np.count_nonzero(ensemble.merged))} members with merges")
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Advance many perturbed copies of the solar system in one batched pass")
+    parser.add_argument("--members", type=int, default=100, help="ensemble size, member 0 is the unperturbed reference")
+    parser.add_argument("--mass-jitter", dest="massJitter", type=float, default=1e-6, help="relative standard deviation of body masses")
+    parser.add_argument("--position-jitter", dest="positionJitter", type=float, default=1e-9, help="standard deviation of positions relative to orbital distance")
+    parser.add_argument("--duration", type=float, default=365 * 24 * 60 * 60, help="simulated seconds")
+    parser.add_argument("--time-step", dest="timeStep", type=float, default=60 * 60, help="seconds per step")
+    parser.add_argument("--sample-interval", dest="sampleInterval", type=float, default=30 * 24 * 60 * 60, help="simulated seconds between divergence samples")
+    parser.add_argument("--G", type=float, default=6.67430e-11)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="ensemble.jsonl")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    runEnsemble(parseArguments())
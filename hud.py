@@ -0,0 +1,44 @@
+from collections import OrderedDict
+import pygame
+
+class TextCache:
+    def __init__(self, font, colour, maxEntries=512):
+        self.font = font
+        self.colour = colour
+        self.maxEntries = maxEntries
+        self.surfaces = OrderedDict()
+
+    def render(self, text):
+        surface = self.surfaces.get(text)
+        if surface is None:
+            surface = self.font.render(text, True, self.colour)
+            self.surfaces[text] = surface
+            if len(self.surfaces) > self.maxEntries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(text)
+        return surface
+
+class HudLayer:
+    def __init__(self, textCache, lineHeight=20):
+        self.textCache = textCache
+        self.lineHeight = lineHeight
+        self.lines = None
+        self.surface = None
+
+    def compose(self, lines):
+        lineSurfaces = [self.textCache.render(text) if text else None for text in lines]
+        width = max((surface.get_width() for surface in lineSurfaces if surface), default=1)
+        height = max(len(lines) * self.lineHeight, 1)
+        if self.surface is None or self.surface.get_size() != (width, height):
+            self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        for i, surface in enumerate(lineSurfaces):
+            if surface:
+                self.surface.blit(surface, (0, i * self.lineHeight))
+
+    def draw(self, screen, lines, position):
+        if lines != self.lines:
+            self.compose(lines)
+            self.lines = list(lines)
+        screen.blit(self.surface, position)
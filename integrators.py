@@ -0,0 +1,162 @@
+import numpy as np
+from kernels import directAccelerationsAndTimescales
+from kepler import keplerDrift
+
+YOSHIDA_W1 = 1 / (2 - 2 ** (1 / 3))
+YOSHIDA_W0 = -(2 ** (1 / 3)) / (2 - 2 ** (1 / 3))
+
+class Integrator:
+    name = ""
+    stages = []
+    requiresArrays = False
+    maxBodies = None
+
+    def supports(self, bodyCount):
+        return self.maxBodies is None or bodyCount <= self.maxBodies
+
+    def startsWithKick(self):
+        return bool(self.stages) and self.stages[0][0] == "kick"
+
+    def step(self, simulation, deltaTime):
+        for operation, weight in self.stages:
+            if operation == "kick":
+                simulation.kick(weight * deltaTime)
+            else:
+                simulation.drift(weight * deltaTime)
+
+class EulerIntegrator(Integrator):
+    name = "euler"
+    stages = [("kick", 1.0), ("drift", 1.0)]
+
+class LeapfrogIntegrator(Integrator):
+    name = "leapfrog"
+    stages = [("kick", 0.5), ("drift", 1.0), ("kick", 0.5)]
+
+class YoshidaIntegrator(Integrator):
+    name = "yoshida"
+    stages = [
+        ("drift", YOSHIDA_W1 / 2),
+        ("kick", YOSHIDA_W1),
+        ("drift", (YOSHIDA_W0 + YOSHIDA_W1) / 2),
+        ("kick", YOSHIDA_W0),
+        ("drift", (YOSHIDA_W0 + YOSHIDA_W1) / 2),
+        ("kick", YOSHIDA_W1),
+        ("drift", YOSHIDA_W1 / 2),
+    ]
+
+class BlockTimeStepIntegrator(Integrator):
+    name = "block"
+    requiresArrays = True
+    # Per-body timescales come from the direct kernel, so every evaluation is O(N^2) whatever solver is selected.
+    maxBodies = 5000
+
+    def __init__(self, eta=0.02, maxLevel=12):
+        self.eta = eta
+        self.maxLevel = maxLevel
+        self.desiredSteps = None
+        self.forceEvaluations = 0
+
+    def levelsFor(self, desiredSteps, deltaTime):
+        with np.errstate(divide="ignore"):
+            levels = np.ceil(np.log2(deltaTime / desiredSteps))
+        return np.clip(np.nan_to_num(levels, nan=0.0, neginf=0.0), 0, self.maxLevel).astype(np.int64)
+
+    def evaluate(self, simulation, targets):
+        state = simulation.state
+        with simulation.timings.measure("forces"):
+            accelerations, timescales, potentials = directAccelerationsAndTimescales(state.positions, state.masses, simulation.G, targets)
+        state.accelerations[targets] = accelerations
+        if len(targets) == len(state.positions):
+            simulation.potentialEnergy = 0.5 * float(state.masses @ potentials)
+        self.desiredSteps[targets] = self.eta * timescales
+        self.forceEvaluations += len(targets) * len(state.positions)
+
+    def step(self, simulation, deltaTime):
+        state = simulation.state
+        bodyCount = len(state.positions)
+        if simulation.forcesStale or self.desiredSteps is None or len(self.desiredSteps) != bodyCount:
+            self.desiredSteps = np.zeros(bodyCount)
+            self.evaluate(simulation, np.arange(bodyCount))
+
+        levels = self.levelsFor(self.desiredSteps, deltaTime)
+        finestLevel = int(levels.max()) if bodyCount else 0
+        tickCount = 1 << finestLevel
+        tick = deltaTime / tickCount
+        strides = 1 << (finestLevel - levels)
+
+        for index in range(tickCount):
+            starting = index % strides == 0
+            state.velocities[starting] += state.accelerations[starting] * (strides[starting] * tick / 2)[:, np.newaxis]
+            state.positions += state.velocities * tick
+
+            active = np.flatnonzero((index + 1) % strides == 0)
+            self.evaluate(simulation, active)
+            state.velocities[active] += state.accelerations[active] * (strides[active] * tick / 2)[:, np.newaxis]
+
+            newLevels = np.minimum(self.levelsFor(self.desiredSteps[active], deltaTime), finestLevel)
+            aligned = (index + 1) % (1 << (finestLevel - newLevels)) == 0
+            while not aligned.all():
+                newLevels[~aligned] += 1
+                aligned = (index + 1) % (1 << (finestLevel - newLevels)) == 0
+            levels[active] = newLevels
+            strides[active] = 1 << (finestLevel - newLevels)
+        simulation.forcesStale = False
+
+class WisdomHolmanIntegrator(Integrator):
+    name = "wisdomHolman"
+    requiresArrays = True
+
+    def step(self, simulation, deltaTime):
+        state = simulation.state
+        if len(state.masses) < 2:
+            state.positions += state.velocities * deltaTime
+            simulation.forcesStale = True
+            return
+        central = int(np.argmax(state.masses))
+        planets = np.flatnonzero(np.arange(len(state.masses)) != central)
+        centralMass = state.masses[central]
+        masses = state.masses[planets]
+        totalMass = state.masses.sum()
+        mu = simulation.G * centralMass
+
+        barycentre = state.masses @ state.positions / totalMass
+        barycentreVelocity = state.masses @ state.velocities / totalMass
+        positions = state.positions[planets] - state.positions[central]
+        velocities = state.velocities[planets] - barycentreVelocity
+
+        # Democratic heliocentric splitting: interaction kick, central-momentum drift, Kepler drift.
+        interaction = simulation.computeAccelerations(positions, masses)
+        velocities += interaction * (deltaTime / 2)
+        positions += (masses @ velocities / centralMass) * (deltaTime / 2)
+        positions, velocities = keplerDrift(positions, velocities, mu, deltaTime)
+        positions += (masses @ velocities / centralMass) * (deltaTime / 2)
+        interaction = simulation.computeAccelerations(positions, masses)
+        velocities += interaction * (deltaTime / 2)
+
+        barycentre = barycentre + barycentreVelocity * deltaTime
+        centralPosition = barycentre - masses @ positions / totalMass
+        state.positions[central] = centralPosition
+        state.positions[planets] = positions + centralPosition
+        state.velocities[central] = barycentreVelocity - masses @ velocities / centralMass
+        state.velocities[planets] = velocities + barycentreVelocity
+
+        distances = np.linalg.norm(positions, axis=1)
+        inverseCube = distances ** -3
+        state.accelerations[planets] = interaction - mu * positions * inverseCube[:, np.newaxis]
+        state.accelerations[central] = simulation.G * (masses * inverseCube) @ positions
+        simulation.forcesStale = True
+        # The last interaction kick already summed the planet-planet potential, add the central term.
+        simulation.potentialEnergy = simulation.evaluatedPotential - mu * float(masses @ (1 / distances))
+
+INTEGRATORS = {
+    EulerIntegrator.name: EulerIntegrator,
+    LeapfrogIntegrator.name: LeapfrogIntegrator,
+    YoshidaIntegrator.name: YoshidaIntegrator,
+    BlockTimeStepIntegrator.name: BlockTimeStepIntegrator,
+    WisdomHolmanIntegrator.name: WisdomHolmanIntegrator,
+}
+
+def createIntegrator(name):
+    if name not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator {name!r}, expected one of {', '.join(INTEGRATORS)}")
+    return INTEGRATORS[name]()
@@ -0,0 +1,72 @@
+import numpy as np
+
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-13
+
+def stumpff(z):
+    c = np.empty_like(z)
+    s = np.empty_like(z)
+    positive = z > 1e-8
+    negative = z < -1e-8
+    small = ~(positive | negative)
+
+    root = np.sqrt(z[positive])
+    c[positive] = (1 - np.cos(root)) / z[positive]
+    s[positive] = (root - np.sin(root)) / root ** 3
+
+    root = np.sqrt(-z[negative])
+    c[negative] = (np.cosh(root) - 1) / -z[negative]
+    s[negative] = (np.sinh(root) - root) / root ** 3
+
+    zs = z[small]
+    c[small] = 1 / 2 - zs / 24 + zs ** 2 / 720
+    s[small] = 1 / 6 - zs / 120 + zs ** 2 / 5040
+    return c, s
+
+def keplerDrift(positions, velocities, mu, deltaTime):
+    radius = np.linalg.norm(positions, axis=1)
+    radialVelocity = np.einsum("ij,ij->i", positions, velocities) / radius
+    speedSquared = np.einsum("ij,ij->i", velocities, velocities)
+    alpha = 2 / radius - speedSquared / mu
+    rootMu = np.sqrt(mu)
+
+    elapsed = np.full(len(positions), float(deltaTime))
+    bound = alpha > 0
+    period = 2 * np.pi / (rootMu * alpha[bound] ** 1.5)
+    elapsed[bound] = np.fmod(elapsed[bound], period)
+
+    chi = rootMu * elapsed / radius
+    chi[bound] = rootMu * alpha[bound] * elapsed[bound]
+    unbound = alpha < -1e-12 / radius
+    if unbound.any():
+        semiMajor = 1 / alpha[unbound]
+        direction = np.sign(elapsed[unbound])
+        rv = radius[unbound] * radialVelocity[unbound]
+        argument = -2 * mu * alpha[unbound] * elapsed[unbound] / (rv + direction * np.sqrt(-mu * semiMajor) * (1 - radius[unbound] * alpha[unbound]))
+        guess = direction * np.sqrt(-semiMajor) * np.log(np.where(argument > 0, argument, 1.0))
+        chi[unbound] = np.where(argument > 1, guess, chi[unbound])
+    radialTerm = radius * radialVelocity / rootMu
+    energyTerm = 1 - alpha * radius
+    for _ in range(MAX_ITERATIONS):
+        z = alpha * chi ** 2
+        c, s = stumpff(z)
+        value = radialTerm * chi ** 2 * c + energyTerm * chi ** 3 * s + radius * chi - rootMu * elapsed
+        slope = radialTerm * chi * (1 - z * s) + energyTerm * chi ** 2 * c + radius
+        curvature = radialTerm * (1 - z * c) + energyTerm * chi * (1 - z * s)
+        # Laguerre-Conway update with n = 5, which converges from poor starting guesses.
+        root = np.sqrt(np.abs(16 * slope ** 2 - 20 * value * curvature))
+        delta = 5 * value / (slope + np.copysign(root, slope))
+        chi = chi - delta
+        if np.all(np.abs(delta) <= TOLERANCE * np.maximum(np.abs(chi), 1.0)):
+            break
+
+    z = alpha * chi ** 2
+    c, s = stumpff(z)
+    f = 1 - chi ** 2 / radius * c
+    g = elapsed - chi ** 3 / rootMu * s
+    newPositions = f[:, np.newaxis] * positions + g[:, np.newaxis] * velocities
+    newRadius = np.linalg.norm(newPositions, axis=1)
+    fDot = rootMu / (newRadius * radius) * (alpha * chi ** 3 * s - chi)
+    gDot = 1 - chi ** 2 / newRadius * c
+    newVelocities = fDot[:, np.newaxis] * positions + gDot[:, np.newaxis] * velocities
+    return newPositions, newVelocities
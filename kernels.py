@@ -0,0 +1,92 @@
+import numpy as np
+
+MAX_BLOCK_ELEMENTS = 1 << 20
+
+def rowBlockSize(targetCount, sourceCount):
+    return max(1, min(targetCount, MAX_BLOCK_ELEMENTS // max(sourceCount, 1)))
+
+def directAccelerations(positions, masses, G, targets=None):
+    if targets is None:
+        targets = np.arange(len(positions))
+    accelerations = np.zeros((len(targets), 2))
+    blockSize = rowBlockSize(len(targets), len(positions))
+    for start in range(0, len(targets), blockSize):
+        rows = targets[start:start + blockSize]
+        accelerations[start:start + blockSize] = accelerationBlock(positions, masses, G, rows)
+    return accelerations
+
+def accelerationBlock(positions, masses, G, rows):
+    direction = positions[np.newaxis, :, :] - positions[rows, np.newaxis, :]
+    distanceSquared = np.einsum("ijk,ijk->ij", direction, direction)
+    with np.errstate(divide="ignore"):
+        inverseCube = np.where(distanceSquared > 0, distanceSquared ** -1.5, 0.0)
+    return G * np.einsum("ij,ijk->ik", inverseCube * masses, direction)
+
+def directAccelerationsAndPotentials(positions, masses, G, targets=None):
+    if targets is None:
+        targets = np.arange(len(positions))
+    accelerations = np.zeros((len(targets), 2))
+    potentials = np.zeros(len(targets))
+    blockSize = rowBlockSize(len(targets), len(positions))
+    for start in range(0, len(targets), blockSize):
+        rows = targets[start:start + blockSize]
+        accelerations[start:start + blockSize], potentials[start:start + blockSize] = accelerationAndPotentialBlock(positions, masses, G, rows)
+    return accelerations, potentials
+
+def accelerationAndPotentialBlock(positions, masses, G, rows):
+    direction = positions[np.newaxis, :, :] - positions[rows, np.newaxis, :]
+    distanceSquared = np.einsum("ijk,ijk->ij", direction, direction)
+    with np.errstate(divide="ignore"):
+        inverse = np.where(distanceSquared > 0, distanceSquared ** -0.5, 0.0)
+    inverseCube = inverse * inverse * inverse
+    return G * np.einsum("ij,ijk->ik", inverseCube * masses, direction), -G * (inverse @ masses)
+
+def ensembleAccelerationsAndPotentials(positions, masses, G):
+    memberCount, bodyCount = masses.shape
+    accelerations = np.zeros_like(positions)
+    potentials = np.zeros_like(masses)
+    blockSize = max(1, MAX_BLOCK_ELEMENTS // max(bodyCount * bodyCount, 1))
+    for start in range(0, memberCount, blockSize):
+        block = slice(start, start + blockSize)
+        direction = positions[block, np.newaxis, :, :] - positions[block, :, np.newaxis, :]
+        distanceSquared = np.einsum("eijk,eijk->eij", direction, direction)
+        with np.errstate(divide="ignore"):
+            inverse = np.where(distanceSquared > 0, distanceSquared ** -0.5, 0.0)
+        weighted = inverse * masses[block, np.newaxis, :]
+        potentials[block] = -G * weighted.sum(axis=2)
+        accelerations[block] = G * np.einsum("eij,eijk->eik", weighted * inverse * inverse, direction)
+    return accelerations, potentials
+
+def directAccelerationsAndTimescales(positions, masses, G, targets=None):
+    if targets is None:
+        targets = np.arange(len(positions))
+    accelerations = np.zeros((len(targets), 2))
+    timescales = np.full(len(targets), np.inf)
+    potentials = np.zeros(len(targets))
+    blockSize = rowBlockSize(len(targets), len(positions))
+    for start in range(0, len(targets), blockSize):
+        rows = targets[start:start + blockSize]
+        direction = positions[np.newaxis, :, :] - positions[rows, np.newaxis, :]
+        distanceSquared = np.einsum("ijk,ijk->ij", direction, direction)
+        pairMass = masses[np.newaxis, :] + masses[rows, np.newaxis]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = np.where(distanceSquared > 0, distanceSquared ** -0.5, 0.0)
+            inverseCube = inverse * inverse * inverse
+            freeFall = np.where((distanceSquared > 0) & (pairMass > 0), inverseCube * pairMass, 0.0)
+        accelerations[start:start + blockSize] = G * np.einsum("ij,ijk->ik", inverseCube * masses, direction)
+        potentials[start:start + blockSize] = -G * (inverse @ masses)
+        strongest = freeFall.max(axis=1) if len(positions) else np.zeros(len(rows))
+        timescales[start:start + blockSize] = np.divide(1.0, np.sqrt(G * strongest), out=np.full(len(rows), np.inf), where=strongest > 0)
+    return accelerations, timescales, potentials
+
+def potentialEnergy(positions, masses, G):
+    energy = 0.0
+    blockSize = rowBlockSize(len(positions), len(positions))
+    for start in range(0, len(positions), blockSize):
+        rows = np.arange(start, min(start + blockSize, len(positions)))
+        direction = positions[np.newaxis, :, :] - positions[rows, np.newaxis, :]
+        distance = np.sqrt(np.einsum("ijk,ijk->ij", direction, direction))
+        with np.errstate(divide="ignore"):
+            inverse = np.where((np.arange(len(positions))[np.newaxis, :] > rows[:, np.newaxis]) & (distance > 0), 1 / distance, 0.0)
+        energy -= G * float(masses[rows] @ inverse @ masses)
+    return energy
@@ -2,10 +2,18 @@ import pygame
 import os
 import time
 import math
-from collections import deque
+import numpy as np
 import cProfile
 import pstats
 import io
+import argparse
+from hud import TextCache, HudLayer
+from simloop import SimulationLoop
+from telemetry import TelemetryServer
+from recording import Trajectory, ReplayPlayer
+from timing import PhaseTimer
+from scenarios import GENERATORS
+from simulation import Vector2D, createSimulation, BLACK, RED, BLUE, WHITE
 
 def clear():
     if os.name == "nt": 
@@ -13,181 +21,9 @@ def clear():
     else:
         os.system("clear")
 
-BLACK = (0, 0, 0)
-RED = (255, 0 ,0)
-YELLOW = (255, 255, 0)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-BROWN = (80, 80, 80)
-WHITE = (255,255,255)
-LIGHTGREY = (150, 150, 150)
-LIGHTBLUE = (0, 0, 150)
-GREY = (21, 21, 21)
-
 SECONDS_PER_DAY = 24 * 60 * 60        
 SECONDS_PER_YEAR = 365 * SECONDS_PER_DAY  
 
-class Vector2D:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-
-    def __repr__(self):
-        return f"Vector2D({self.x}, {self.y})"
-
-    def __add__(self, other):
-        return Vector2D(self.x + other.x, self.y + other.y)
-    
-    def __sub__(self, other):
-        return Vector2D(self.x - other.x, self.y - other.y)
-    
-    def __mul__(self, scalar):
-        return Vector2D(self.x * scalar, self.y * scalar)
-
-    def __truediv__(self, other):
-        return Vector2D(self.x / other, self.y / other)
-    
-    def __neg__(self):
-        return Vector2D(-self.x, -self.y)
-
-    def tuple(self):
-        return (self.x, self.y)
-    
-    def castInt(self):
-        return Vector2D(int(self.x), int(self.y))
-
-    def magnitude(self): 
-        return (self.x**2 + self.y**2) ** 0.5
-
-    def squaredMagnitude(self):
-        return (self.x**2 + self.y**2)
-
-    def normalise(self): 
-        mag = self.magnitude()
-        if mag == 0:
-            return Vector2D(0, 0)
-        return Vector2D(self.x / mag, self.y / mag)
-
-class Body:
-    def __init__(self, distance, mass, bodyRadius, colour, bodyName):
-        self.position = Vector2D(distance, 0)
-        self.mass = mass
-        self.velocity = Vector2D(0, 0)
-        self.acceleration = Vector2D(0, 0)
-        
-        self.colour = colour
-        self.bodyRadius = int(bodyRadius)
-        self.orbitMinDistance = 1e8
-        self.orbitPoints = deque(maxlen=10000)
-        self.bodyName = bodyName
-
-    def applyForce(self, force):
-        self.acceleration += force / self.mass
-
-    def update(self, deltaTime):
-        self.velocity += self.acceleration * deltaTime
-        self.position += self.velocity * deltaTime
-        self.lastAcceleration = self.acceleration
-        self.acceleration = Vector2D(0, 0)
-    
-    def combineColour(self, other):
-        red = ((self.colour[0] + other.colour[0])) // 2
-        green = ((self.colour[1] + other.colour[1])) // 2
-        blue = ((self.colour[2] + other.colour[2])) // 2
-        return (red, green, blue)
-    
-    def calculateOrbitLines(self): 
-        if not self.orbitPoints:
-            self.orbitPoints.append(self.position)
-            return
-        lastPoint = self.orbitPoints[-1]
-        if (self.position-lastPoint).squaredMagnitude() > self.orbitMinDistance:
-            self.orbitPoints.append(self.position)
-
-    def drawOrbitLines(self, screen, offset, scale):
-        self.calculateOrbitLines()
-        if len(self.orbitPoints) < 2:
-            return 0
-        step = max(1, 2 ** int(-math.log10(scale) / 3))
-        points = list(self.orbitPoints)[::step]
-        scaledPoints = [
-            ((p.x + offset.x) * scale, (p.y + offset.y) * scale) 
-            for p in points
-        ]
-        scaledPoints.append(((self.position.x + offset.x) * scale, (self.position.y + offset.y) * scale))
-        if len(scaledPoints) >= 2:
-            pygame.draw.lines(screen, (50, 50, 52), False, scaledPoints, 1)
-    
-class Simulation:
-    def __init__(self, timeStepIndex, G):
-        self.timeStepOptions = [1, 60, 60 * 60, 24 * 60 * 60, 30.4 * 24 * 60 * 60]
-        self.timeStepIndex = timeStepIndex
-        self.timeStep = self.timeStepOptions[timeStepIndex]
-        self.G = G
-        self.elapsedTime = 0
-        self.bodies = []
-        self.initBodies()
-        self.bodyAmount = len(self.bodies)
-
-    def initBodies(self):
-        self.bodies = [
-            Body(0, 1.989e30, 6.9634e8, YELLOW, "Sun"),
-            Body(5.791e10, 3.301e23, 2.4397e6  , LIGHTGREY, "Mercury"),
-            Body(1.0821e11, 4.87e24 , 6.05e6  , BROWN, "Venus"),
-            Body(1.4959787e11, 5.972e24, 6.371e6  , BLUE, "Earth"),
-            Body(1.4959787e11 + 3.844e8, 7.348e22, 1.7374e6, BROWN, "Moon"),
-            Body(2.279e11, 6.39e23 , 3.3895e6 , RED, "Mars"),
-            Body(7.786e11, 1.898e27, 6.9911e7, LIGHTGREY, "Jupiter"),
-            Body(1.4392e12, 5.683e26, 5.8232e7, RED, "Saturn"),
-            Body(4.471e12, 1.024e26, 2.4622e7, BLUE, "Neptune"),
-            Body(2.9233e12, 8.681e25, 2.5362e7, LIGHTBLUE, "Uranus"),
-        ]
-        for i in range(1, len(self.bodies)):
-            self.bodies[i].velocity = calculateOrbitalVelocity(self.bodies[0], self.bodies[i], self.G)
-        self.bodies[4].velocity += calculateOrbitalVelocity(self.bodies[3], self.bodies[4], self.G)
-
-    def step(self, deltaTime):
-        bodyCount = len(self.bodies)
-        for i in range(bodyCount):
-            for j in range(i + 1, bodyCount):
-                force = calculateGravitationalForce(self.bodies[i], self.bodies[j], self.G)
-                self.bodies[i].applyForce(force)
-                self.bodies[j].applyForce(-force)
-
-        for body in self.bodies:
-            body.update(self.timeStep * deltaTime)
-
-        i = 0
-        while i < self.bodyAmount:
-            for j in range(i+1, self.bodyAmount, 1):
-                if checkCollision(self.bodies[i], self.bodies[j]):
-                    self.combineBodies(self.bodies[i], self.bodies[j])
-                    self.bodyAmount = len(self.bodies)
-                    i = -1
-                    break
-            i += 1
-
-        self.elapsedTime += self.timeStep * deltaTime
-    
-    def clearOrbitPoints(self):
-        for body in self.bodies:
-            body.orbitPoints = deque(maxlen=10000)
-
-    def combineBodies(self, body1, body2):
-        combinedMass = body1.mass + body2.mass
-        newPosition = (body1.position * body1.mass + body2.position * body2.mass) / combinedMass
-        newVelocity = (body1.velocity * body1.mass + body2.velocity * body2.mass) / combinedMass
-        newRadius = math.sqrt(body1.radius**2 + body2.radius**2)
-        newColour = body1.combineColour(body2)
-        newName = f"{body1.bodyName}-{body2.bodyName}"
-        newBody = Body(0, combinedMass, newRadius, newColour, newName)
-        newBody.position = newPosition
-        newBody.velocity = newVelocity
-
-        self.bodies.remove(body1)
-        self.bodies.remove(body2)
-        self.bodies.append(newBody)
-
 class Camera:
     def __init__(self, simulation, resolution):
         self.simulation = simulation
@@ -195,23 +31,56 @@ class Camera:
         self.zoomSmoothing = 0.1
         self.followZooming = 0.2
         self.position = Vector2D(0, 0)
+        self.desiredPosition = Vector2D(0, 0)
         self.offset = Vector2D(0, 0)
         self.resolution = resolution
         self.targetScale = self.scale
         self.displayCenter = Vector2D(resolution.x / 2, resolution.y / 2)
         self.cameraFollowIndex = 0
-        self.lastCameraFollowIndex = 0
+        self.cameraFollowId = None
+        self.lastCameraFollowId = None
         self.targetPixelRadius = 9
 
     def getCameraCenter(self):
         return Vector2D(self.displayCenter.x / self.scale, self.displayCenter.y / self.scale)
 
+    def followIndex(self, index):
+        self.cameraFollowIndex = index
+        self.cameraFollowId = int(self.simulation.bodyIds()[index])
+        self.offset = Vector2D(0, 0)
+
+    # Track the body by id so merges and reordering don't silently move the focus to another body.
+    def resolveFollowIndex(self):
+        ids = self.simulation.bodyIds()
+        if len(ids) == 0:
+            return
+        if self.cameraFollowId is None:
+            self.cameraFollowIndex = min(self.cameraFollowIndex, len(ids) - 1)
+            self.cameraFollowId = self.lastCameraFollowId = int(ids[self.cameraFollowIndex])
+            return
+        if self.cameraFollowIndex < len(ids) and ids[self.cameraFollowIndex] == self.cameraFollowId:
+            return
+        bodyId = self.cameraFollowId
+        while bodyId is not None:
+            matches = np.flatnonzero(ids == bodyId)
+            if len(matches):
+                self.cameraFollowIndex = int(matches[0])
+                self.cameraFollowId = bodyId
+                return
+            bodyId = self.simulation.mergeTarget(bodyId)
+        self.cameraFollowIndex = 0
+        self.cameraFollowId = int(ids[0])
+
+    def screenToWorld(self, x, y):
+        return (x / self.scale - self.position.x, y / self.scale - self.position.y)
+
     def zoomToFill(self):
         targetRadius = self.simulation.bodies[self.cameraFollowIndex].bodyRadius
         if targetRadius > 0:
             self.targetScale = self.targetPixelRadius / targetRadius
     
     def updateCamera(self):
+        self.resolveFollowIndex()
         targetPosition = self.simulation.bodies[self.cameraFollowIndex].position
 
         scaleDifference = abs(self.targetScale - self.scale)
@@ -221,16 +90,18 @@ class Camera:
         else: 
             self.scale += (self.targetScale - self.scale) * self.zoomSmoothing
         
-        desiredPosition = self.getCameraCenter() - self.offset - targetPosition
-
-        if self.lastCameraFollowIndex != self.cameraFollowIndex:
-            self.position += (desiredPosition - self.position) * self.followZooming
-            if (desiredPosition - self.position).magnitude() < 9e9:
-                self.position = desiredPosition
-                self.lastCameraFollowIndex = self.cameraFollowIndex
+        desiredPosition = self.desiredPosition.set(
+            self.displayCenter.x / self.scale - self.offset.x - targetPosition.x,
+            self.displayCenter.y / self.scale - self.offset.y - targetPosition.y)
+
+        if self.lastCameraFollowId != self.cameraFollowId:
+            self.position.imul(1 - self.followZooming).addScaled(desiredPosition, self.followZooming)
+            if (desiredPosition.x - self.position.x)**2 + (desiredPosition.y - self.position.y)**2 < 9e9**2:
+                self.position.set(desiredPosition.x, desiredPosition.y)
+                self.lastCameraFollowId = self.cameraFollowId
             return
 
-        self.position = desiredPosition
+        self.position.set(desiredPosition.x, desiredPosition.y)
 
 class Renderer:
     def __init__(self, simulation, camera, screen, resolution, font):
@@ -244,30 +115,122 @@ class Renderer:
         self.resolution = resolution
         self.gridSize = 50
         self.maxArrowLength = 30
+        self.maxArrowBodies = 256
+        self.textCache = TextCache(font, WHITE)
+        self.statusLayer = HudLayer(self.textCache)
+        self.helpLayer = HudLayer(self.textCache)
+        self.timingLayer = HudLayer(self.textCache)
+        self.warningLayer = HudLayer(TextCache(font, RED))
+        self.timings = PhaseTimer(("camera", "orbits", "bodies", "arrows", "hud"))
+        self.timingLines = []
+        self.timingRefresh = 0
         
     def render(self):
         self.screen.fill(BLACK)
-        self.camera.updateCamera()
-        maxVelocity = max(body.velocity.magnitude() for body in self.simulation.bodies) if self.simulation.bodies else 1
-        for body in self.simulation.bodies:
-            if self.doOrbitLines:
-               body.drawOrbitLines(self.screen, self.camera.position, self.camera.scale)
+        with self.timings.measure("camera"):
+            self.camera.updateCamera()
+        bodies = self.simulation.bodies
+        positions, velocities, radii, colours = self.simulation.bodyArrays()
+        screenPositions = (positions + self.camera.position.tuple()) * self.camera.scale
+        pixelRadii = np.maximum((radii * self.camera.scale).astype(np.int64), 1)
+        visible = ((screenPositions[:, 0] + pixelRadii >= 0) & (screenPositions[:, 0] - pixelRadii < self.resolution.x)
+                   & (screenPositions[:, 1] + pixelRadii >= 0) & (screenPositions[:, 1] - pixelRadii < self.resolution.y))
+        resolvable = visible & (pixelRadii > 1)
+        maxVelocity = float(np.linalg.norm(velocities, axis=1).max()) if len(bodies) else 1
+
+        if self.doOrbitLines:
+            with self.timings.measure("orbits"):
+                for body in bodies:
+                    self.drawOrbitLines(body)
+
+        with self.timings.measure("bodies"):
+            points = visible & ~resolvable
+            self.drawPoints(screenPositions[points], colours[points])
+            for index in np.flatnonzero(resolvable):
+                self.drawBody(bodies[index])
+
+        if self.doArrows:
+            with self.timings.measure("arrows"):
+                arrowBodies = visible if np.count_nonzero(visible) <= self.maxArrowBodies else resolvable
+                focus = bodies[self.camera.cameraFollowIndex]
+                for index in np.flatnonzero(arrowBodies):
+                    if self.doRelativeArrows:
+                        self.drawArrows(bodies[index], focus.velocity.magnitude(), focus)
+                    else:
+                        self.drawArrows(bodies[index], maxVelocity)
+
+        with self.timings.measure("hud"):
+            self.drawScale()
+            self.drawDebugText()
+            self.drawWarpWarning()
+            if self.timings.enabled:
+                self.drawTimings()
+        self.timings.endFrame()
+
+    def drawTimings(self, refreshInterval=0.25):
+        now = time.perf_counter()
+        if now >= self.timingRefresh:
+            self.timingRefresh = now + refreshInterval
+            self.timingLines = ["Phase timings (ms)"]
+            for title, averages in (("Physics", self.simulation.phaseAverages()), ("Render", self.timings.averages())):
+                self.timingLines.append(f"{title}: {sum(averages.values()):.2f}")
+                self.timingLines.extend(f"   {phase}: {milliseconds:.2f}" for phase, milliseconds in averages.items())
+        self.timingLayer.draw(self.screen, self.timingLines, (self.resolution.x - 220, 10))
+
+    def toggleTimingExport(self):
+        if not self.timings.enabled:
+            return
+        if self.timings.csvFile is None:
+            self.timings.startCsv(time.strftime("timings-render-%Y%m%d-%H%M%S.csv"))
+        else:
+            self.timings.stopCsv()
 
-            self.drawBody(body)
+    def drawOrbitLines(self, body):
+        position = body.position
+        body.orbitPoints.record(position.x, position.y, body.orbitMinDistance)
+        if len(body.orbitPoints) < 2:
+            return
+        scaledPoints = body.orbitPoints.projected(self.camera.position, self.camera.scale, position)
+        pygame.draw.lines(self.screen, (50, 50, 52), False, scaledPoints, 1)
 
-            if self.doArrows and self.doRelativeArrows:
-                self.drawArrows(body, self.simulation.bodies[self.camera.cameraFollowIndex].velocity.magnitude(), self.simulation.bodies[self.camera.cameraFollowIndex])    
-            elif self.doArrows:
-                self.drawArrows(body, maxVelocity)
+    def drawPoints(self, screenPositions, colours):
+        if not len(screenPositions):
+            return
+        x = screenPositions[:, 0].astype(np.int64)
+        y = screenPositions[:, 1].astype(np.int64)
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        width, height = pixels.shape[:2]
+        # Same 2x2 footprint pygame.draw.circle gives a radius 1 circle.
+        for dx, dy in ((-1, -1), (0, -1), (-1, 0), (0, 0)):
+            px = x + dx
+            py = y + dy
+            inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+            pixels[px[inside], py[inside]] = colours[inside]
+        del pixels
 
-        self.drawScale()
-        self.drawDebugText()
-    
     def drawBody(self, body):
         position = (body.position + self.camera.position) * self.camera.scale
         radius = max(int(body.bodyRadius * self.camera.scale), 1)
         pygame.draw.circle(self.screen, body.colour, position.castInt().tuple(), radius)
 
+    def drawWarpWarning(self, threshold=0.98):
+        warpRatio, subSteps, stepSize = self.simulation.warpStatus()
+        if warpRatio >= threshold:
+            return
+        lines = [f"Time warp limited to {warpRatio:.0%} of requested", f"({subSteps} substeps of {stepSize:.3g} s per tick)"]
+        self.warningLayer.draw(self.screen, lines, (self.resolution.x // 2 - 150, 10))
+
+    def diagnosticsText(self):
+        record, maxDrift, autoReduce = self.simulation.latestDiagnostics()
+        if record is None:
+            return []
+        autoStep = "on" if autoReduce else "off"
+        return [
+            f"Energy drift: {record.energyDrift:.2e} (max {maxDrift:.2e}, {record.energyDriftRate:.1e}/yr)",
+            f"Momentum drift: {record.momentumDrift:.2e}, angular: {record.angularMomentumDrift:.2e}",
+            f"Step size: {record.stepSize:.3g} s (auto reduction {autoStep})",
+        ]
+
     def drawDebugText(self):
         elapsed = self.simulation.elapsedTime
         year = int(elapsed // SECONDS_PER_YEAR)
@@ -281,6 +244,10 @@ class Renderer:
         debugText = [
             f"Scale: {1/self.camera.scale:.2e} meters per pixel",
             f"Time Step: 1 {timeStepText[self.simulation.timeStepIndex]} per second",
+            f"Physics: {self.simulation.describePhysics()}",
+            f"Integrator: {self.simulation.integrator.name}",
+            f"Recording: {self.simulation.describeRecording()}",
+            *self.diagnosticsText(),
             "",
             f"Year(s): {year}",
             f"Day(s): {day}",
@@ -293,13 +260,26 @@ class Renderer:
             f"      Mass: {self.simulation.bodies[self.camera.cameraFollowIndex].mass:.2e} Kg",
             f"      Velocity: {self.simulation.bodies[self.camera.cameraFollowIndex].velocity.magnitude():.2e} m/s",
             "",
+        ]
+        helpText = [
             "[Mouse Wheel/+/-] Zoom (10%)",
             "[Ctrl + Mouse Wheel] Zoom (50%)",
             "[<-/->] Cycle focus",
+            "[LMB] Focus body under cursor",
+            "[N] Focus nearest heavier body",
             "[RMB] Camera panning",
             "[Z] Toggle arrows",
             "[X] Toggle relative arrows",
             "[T] Cycle time step",
+            "[I] Cycle integrator",
+            "[V] Toggle vectorized physics",
+            "[B] Toggle Barnes-Hut gravity",
+            "[G] Toggle trajectory recording",
+            "[H] Toggle timing overlay",
+            "[J] Toggle timing CSV export",
+            "[K] Toggle auto step reduction",
+            "[,/.] Seek replay (5%)",
+            "[Space] Pause replay",
             "[C] Reset camera",
             "[F] Zoom to fill",
             "[O] Toggle orbit lines",
@@ -308,10 +288,8 @@ class Renderer:
             "[Q/E] Adjust focus mass (10%)",
             "[R] Restart"
         ]
-        for i, text in enumerate(debugText):
-            if text == "":
-                continue
-            self.drawText(text, (10, 10 + i*20))
+        self.statusLayer.draw(self.screen, debugText, (10, 10))
+        self.helpLayer.draw(self.screen, helpText, (10, 10 + len(debugText) * 20))
 
     def drawScale(self, maxLength = 300):
         startPos = (20, self.resolution.y - 40)
@@ -384,8 +362,7 @@ class Renderer:
             offset = tickLength
             pygame.draw.line(self.screen, WHITE, endPos, (endPos[0], endPos[1] + offset), thickness)
     def drawText(self, text, position):
-        textSurface = self.font.render(text, True, WHITE)
-        self.screen.blit(textSurface, position)
+        self.screen.blit(self.textCache.render(text), position)
 
 class InputHandler:
     def __init__(self, simulation, renderer, camera):
@@ -425,9 +402,21 @@ class InputHandler:
                 self.camera.targetScale /= 1.5
             else:
                 self.camera.targetScale /= 1.1
+        elif event.button == 1:
+            self.focusAt(*event.pos)
         elif event.button == 3:
             self.panning = True
 
+    def focusAt(self, x, y, pixelTolerance=8):
+        index = self.camera.simulation.spatialIndex().pick(self.camera.screenToWorld(x, y), pixelTolerance / self.camera.scale)
+        if index is not None:
+            self.camera.followIndex(index)
+
+    def focusNearestHeavier(self):
+        index = self.camera.simulation.spatialIndex().nearestHeavier(self.camera.cameraFollowIndex)
+        if index is not None:
+            self.camera.followIndex(index)
+
     def handleMouseButtonUp(self,event):
         if event.button == 3:
             self.panning = False
@@ -439,16 +428,37 @@ class InputHandler:
 
     def handleKeyDown(self, event):
         if event.key == pygame.K_RIGHT:
-            self.camera.cameraFollowIndex = (self.camera.cameraFollowIndex + 1) % len(self.simulation.bodies)
-            self.camera.offset = Vector2D(0, 0)
+            self.camera.followIndex((self.camera.cameraFollowIndex + 1) % len(self.camera.simulation.bodies))
         elif event.key == pygame.K_LEFT:
-            self.camera.cameraFollowIndex = (self.camera.cameraFollowIndex - 1) % len(self.simulation.bodies)
-            self.camera.offset = Vector2D(0, 0)
+            self.camera.followIndex((self.camera.cameraFollowIndex - 1) % len(self.camera.simulation.bodies))
+        elif event.key == pygame.K_n:
+            self.focusNearestHeavier()
         elif event.key == pygame.K_c:
             self.camera.offset = Vector2D(0, 0)
         elif event.key == pygame.K_t:
-            self.simulation.timeStepIndex = (self.simulation.timeStepIndex + 1) % len(self.simulation.timeStepOptions)
-            self.simulation.timeStep = self.simulation.timeStepOptions[self.simulation.timeStepIndex]
+            self.simulation.queueCommand("cycleTimeStep")
+        elif event.key == pygame.K_i:
+            self.simulation.queueCommand("cycleIntegrator")
+        elif event.key == pygame.K_v:
+            self.simulation.queueCommand("toggleVectorized")
+        elif event.key == pygame.K_b:
+            self.simulation.queueCommand("toggleBarnesHut")
+        elif event.key == pygame.K_g:
+            self.simulation.queueCommand("toggleRecording")
+        elif event.key == pygame.K_h:
+            self.renderer.timings.setEnabled(not self.renderer.timings.enabled)
+            self.simulation.queueCommand("toggleTimings")
+        elif event.key == pygame.K_j:
+            self.renderer.toggleTimingExport()
+            self.simulation.queueCommand("toggleTimingExport")
+        elif event.key == pygame.K_k:
+            self.simulation.queueCommand("toggleAutoStepReduction")
+        elif event.key == pygame.K_COMMA:
+            self.simulation.queueCommand("seekBy", -0.05)
+        elif event.key == pygame.K_PERIOD:
+            self.simulation.queueCommand("seekBy", 0.05)
+        elif event.key == pygame.K_SPACE:
+            self.simulation.queueCommand("togglePause")
         elif event.key == pygame.K_z:
             self.renderer.doArrows = not self.renderer.doArrows
         elif event.key == pygame.K_x:
@@ -458,9 +468,9 @@ class InputHandler:
             self.camera.offset = Vector2D(0, 0)
         elif event.key == pygame.K_o:
             self.renderer.doOrbitLines = not self.renderer.doOrbitLines 
-            self.simulation.clearOrbitPoints()
+            self.camera.simulation.clearOrbitPoints()
         elif event.key == pygame.K_p:
-            self.simulation.clearOrbitPoints()
+            self.camera.simulation.clearOrbitPoints()
         elif event.key == pygame.K_r:
             return False
         return True
@@ -477,32 +487,9 @@ class InputHandler:
                 if self.renderer.maxArrowLength < 5:
                     self.renderer.maxArrowLength = 5
         elif keys[pygame.K_q]:
-            self.simulation.bodies[self.camera.cameraFollowIndex].mass /= 1.2
+            self.simulation.queueCommand("scaleMass", self.camera.cameraFollowId, 1 / 1.2)
         elif keys[pygame.K_e]:
-            self.simulation.bodies[self.camera.cameraFollowIndex].mass *= 1.2
-
-def calculateGravitationalForce(body1, body2, G):
-    direction = body2.position - body1.position
-    distanceSquared = direction.squaredMagnitude()
-    if distanceSquared == 0:
-        return Vector2D(0, 0)
-    forceMagnitude = (G * body1.mass * body2.mass) / distanceSquared
-    forceDirection = direction / (distanceSquared) ** 0.5
-    return forceDirection * forceMagnitude
-
-def calculateOrbitalVelocity(center, body, G):
-    direction = body.position - center.position
-    distance = (direction.x ** 2 + direction.y ** 2) ** 0.5
-    if distance == 0:
-        return Vector2D(0, 0)
-    velocityMagnitude = (G * center.mass / distance) ** 0.5
-    velocityDirection = Vector2D(-direction.y, direction.x) / distance
-    return velocityDirection * velocityMagnitude
-
-def checkCollision(body1, body2):
-    distanceSquared = (body2.position - body1.position).squaredMagnitude()
-    collisionDistance = (body1.bodyRadius + body2.bodyRadius)
-    return distanceSquared <= collisionDistance**2
+            self.simulation.queueCommand("scaleMass", self.camera.cameraFollowId, 1.2)
 
 def calcPixelRoundedLength(maxLength, scale, unitScaler):
     maxLength = 200
@@ -527,7 +514,7 @@ def chooseResolution():
         else:
             print("\nTry again")
      
-def runSimulation(resolution):
+def runSimulation(resolution, scenarioName=None, bodyCount=10000, seed=None, telemetryAddress=None, telemetryRate=30, maxStepSize=3600):
     clear()
 
     pygame.init()
@@ -537,38 +524,104 @@ def runSimulation(resolution):
     clock = pygame.time.Clock()
     frameRate = 60
 
-    sim = Simulation(3, 6.67430e-11)
-    camera = Camera(sim, resolution)
-    renderer = Renderer(sim, camera, screen, resolution, font)
+    sim = createSimulation(scenarioName, bodyCount, seed, maxStepSize)
+    loop = SimulationLoop(sim, Vector2D).start()
+    # The camera and renderer only ever see published frames, never the simulation the physics thread is stepping.
+    frame = loop.frame()
+    camera = Camera(frame, resolution)
+    renderer = Renderer(frame, camera, screen, resolution, font)
     inputHandler = InputHandler(sim, renderer, camera)
 
+    telemetry = None
+    try:
+        if telemetryAddress:
+            telemetry = TelemetryServer(loop.latestSnapshot, telemetryAddress, telemetryRate).start()
+            print(f"Telemetry: {telemetry.describe()}")
+        running = True
+        while running:
+            clock.tick(frameRate)
+            running = inputHandler.processEvents()
+            frame = loop.frame()
+            renderer.simulation = frame
+            camera.simulation = frame
+            renderer.render()
+            pygame.display.flip()
+    finally:
+        # Closing the simulation finishes any trajectory recording, even after Ctrl-C or a physics error.
+        if telemetry:
+            telemetry.stop()
+        loop.stop()
+        sim.close()
+        renderer.timings.setEnabled(False)
+        pygame.quit()
+
+
+def runReplay(resolution, path):
+    clear()
+
+    pygame.init()
+    pygame.display.set_caption("Planet Sim - Replay")
+    screen = pygame.display.set_mode(resolution.tuple(), pygame.SCALED | pygame.NOFRAME)
+    font = pygame.font.SysFont(None, 24)
+    clock = pygame.time.Clock()
+    frameRate = 60
+
+    player = ReplayPlayer(Trajectory(path), Vector2D)
+    frame = player.frame()
+    camera = Camera(frame, resolution)
+    renderer = Renderer(frame, camera, screen, resolution, font)
+    inputHandler = InputHandler(player, renderer, camera)
+
     running = True
     while running:
         frameTime = clock.tick(frameRate) / 1000
         running = inputHandler.processEvents()
-        sim.step(frameTime)
+        player.advance(frameTime)
+        frame = player.frame()
+        renderer.simulation = frame
+        camera.simulation = frame
         renderer.render()
         pygame.display.flip()
+    renderer.timings.setEnabled(False)
     pygame.quit()
 
 
-def main():
+def main(replayPath=None, scenarioName=None, bodyCount=10000, seed=None, telemetryAddress=None, telemetryRate=30, maxStepSize=3600):
     clear()
     res = chooseResolution()
     while True:
-        runSimulation(res)
-
-profile = cProfile.Profile()
-profile.enable()
-
-try:
-    main()
-except KeyboardInterrupt:
-    pass 
-
-profile.disable()
-s = io.StringIO()
-sortby = "cumulative"
-ps = pstats.Stats(profile, stream=s).sort_stats(sortby)
-ps.print_stats(30)
-print(s.getvalue())
+        if replayPath:
+            runReplay(res, replayPath)
+        else:
+            runSimulation(res, scenarioName, bodyCount, seed, telemetryAddress, telemetryRate, maxStepSize)
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Planetary simulation")
+    parser.add_argument("replay", nargs="?", help="trajectory file to replay instead of simulating")
+    parser.add_argument("--scenario", help=f"one of {', '.join(GENERATORS)} or an .npz/.csv initial conditions file")
+    parser.add_argument("--bodies", type=int, default=10000, help="body count for generated scenarios")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-step", dest="maxStepSize", type=float, default=3600, help="largest physical step in seconds, high time warps run several per tick")
+    parser.add_argument("--telemetry", help="stream live state to tcp:HOST:PORT or unix:PATH (read it with telemetry.py)")
+    parser.add_argument("--telemetry-rate", dest="telemetryRate", type=float, default=30, help="telemetry frames per second")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile and print a report on exit")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    profile = cProfile.Profile() if arguments.profile else None
+    if profile:
+        profile.enable()
+
+    try:
+        main(arguments.replay, arguments.scenario, arguments.bodies, arguments.seed, arguments.telemetry, arguments.telemetryRate, arguments.maxStepSize)
+    except KeyboardInterrupt:
+        pass 
+
+    if profile:
+        profile.disable()
+        s = io.StringIO()
+        sortby = "cumulative"
+        ps = pstats.Stats(profile, stream=s).sort_stats(sortby)
+        ps.print_stats(30)
+        print(s.getvalue())
@@ -0,0 +1,153 @@
+import multiprocessing
+from multiprocessing import resource_tracker
+import os
+import time
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from kernels import directAccelerationsAndPotentials
+
+TILES_PER_WORKER = 4
+
+class SharedArray:
+    def __init__(self, shape):
+        self.shape = shape
+        self.memory = SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 8))
+        self.array = np.ndarray(shape, dtype=np.float64, buffer=self.memory.buf)
+
+    def close(self):
+        self.array = None
+        try:
+            self.memory.close()
+        except BufferError:
+            pass
+        self.memory.unlink()
+
+class SharedBuffers:
+    def __init__(self, bodyCount):
+        self.bodyCount = bodyCount
+        self.positions = SharedArray((bodyCount, 2))
+        self.masses = SharedArray((bodyCount,))
+        self.accelerations = SharedArray((bodyCount, 2))
+        self.potentials = SharedArray((bodyCount,))
+
+    def names(self):
+        return (self.positions.memory.name, self.masses.memory.name, self.accelerations.memory.name, self.potentials.memory.name)
+
+    def close(self):
+        self.positions.close()
+        self.masses.close()
+        self.accelerations.close()
+        self.potentials.close()
+
+workerBuffers = {}
+
+def attachShared(name):
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+def computeTile(task):
+    names, bodyCount, start, end, G = task
+    if names not in workerBuffers:
+        for memories in workerBuffers.values():
+            for memory in memories:
+                memory.close()
+        workerBuffers.clear()
+        workerBuffers[names] = [attachShared(name) for name in names]
+    positionsMemory, massesMemory, accelerationsMemory, potentialsMemory = workerBuffers[names]
+    positions = np.ndarray((bodyCount, 2), dtype=np.float64, buffer=positionsMemory.buf)
+    masses = np.ndarray((bodyCount,), dtype=np.float64, buffer=massesMemory.buf)
+    accelerations = np.ndarray((bodyCount, 2), dtype=np.float64, buffer=accelerationsMemory.buf)
+    potentials = np.ndarray((bodyCount,), dtype=np.float64, buffer=potentialsMemory.buf)
+    accelerations[start:end], potentials[start:end] = directAccelerationsAndPotentials(positions, masses, G, np.arange(start, end))
+    return end - start
+
+def poolContext():
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+class ParallelForceBackend:
+    def __init__(self, workerCount=None):
+        self.workerCount = workerCount or os.cpu_count() or 1
+        # Forked workers must share our resource tracker, or each one unlinks the segments it attached when it exits.
+        resource_tracker.ensure_running()
+        self.pool = poolContext().Pool(self.workerCount)
+        self.stateBuffers = None
+        self.scratchBuffers = None
+
+    def bind(self, state):
+        bodyCount = len(state.positions)
+        buffers = self.stateBuffers
+        if buffers is not None and state.positions is buffers.positions.array and state.masses is buffers.masses.array:
+            return
+        if buffers is None or buffers.bodyCount != bodyCount:
+            self.release(state)
+            if buffers is not None:
+                buffers.close()
+            buffers = self.stateBuffers = SharedBuffers(bodyCount)
+        buffers.positions.array[:] = state.positions
+        buffers.masses.array[:] = state.masses
+        state.positions = buffers.positions.array
+        state.masses = buffers.masses.array
+
+    def release(self, state):
+        if self.stateBuffers is None or state is None:
+            return
+        if state.positions is self.stateBuffers.positions.array:
+            state.positions = state.positions.copy()
+        if state.masses is self.stateBuffers.masses.array:
+            state.masses = state.masses.copy()
+
+    def load(self, positions, masses):
+        if self.scratchBuffers is None or self.scratchBuffers.bodyCount != len(positions):
+            if self.scratchBuffers is not None:
+                self.scratchBuffers.close()
+            self.scratchBuffers = SharedBuffers(len(positions))
+        self.scratchBuffers.positions.array[:] = positions
+        self.scratchBuffers.masses.array[:] = masses
+        return self.scratchBuffers
+
+    def compute(self, buffers, G):
+        bodyCount = buffers.bodyCount
+        tileCount = min(bodyCount, self.workerCount * TILES_PER_WORKER)
+        if tileCount == 0:
+            return np.zeros((0, 2)), np.zeros(0)
+        bounds = np.linspace(0, bodyCount, tileCount + 1).astype(int)
+        tasks = [(buffers.names(), bodyCount, int(start), int(end), G) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        self.pool.map(computeTile, tasks)
+        return buffers.accelerations.array.copy(), buffers.potentials.array.copy()
+
+    def stateAccelerations(self, state, G):
+        self.bind(state)
+        return self.compute(self.stateBuffers, G)
+
+    def accelerations(self, positions, masses, G):
+        return self.compute(self.load(positions, masses), G)
+
+    def measureSpeedup(self, positions, masses, G, repeats=3):
+        serial = min(timed(lambda: directAccelerationsAndPotentials(positions, masses, G)) for _ in range(repeats))
+        parallel = min(timed(lambda: self.accelerations(positions, masses, G)) for _ in range(repeats))
+        return {
+            "bodies": len(positions),
+            "workers": self.workerCount,
+            "serialSeconds": serial,
+            "parallelSeconds": parallel,
+            "speedup": serial / parallel if parallel > 0 else float("inf"),
+        }
+
+    def close(self, state=None):
+        self.release(state)
+        self.pool.close()
+        self.pool.join()
+        for buffers in (self.stateBuffers, self.scratchBuffers):
+            if buffers is not None:
+                buffers.close()
+        self.stateBuffers = None
+        self.scratchBuffers = None
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
@@ -0,0 +1,275 @@
+import json
+import time
+import types
+import numpy as np
+from simloop import Frame
+from trails import OrbitTrail
+
+MAGIC = b"PSIMTRJ2"
+HEADER_SIZE = 128
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"), ("bodyRows", "<i8"), ("frameCount", "<i8"), ("eventCount", "<i8"),
+    ("frameOffset", "<i8"), ("eventOffset", "<i8"), ("metaOffset", "<i8"), ("metaLength", "<i8"),
+])
+BODY_DTYPE = np.dtype([
+    ("id", "<i8"), ("position", "<f8", 2), ("velocity", "<f8", 2), ("acceleration", "<f8", 2),
+    ("mass", "<f8"), ("radius", "<f8"), ("colour", "u1", 3),
+])
+FRAME_DTYPE = np.dtype([("time", "<f8"), ("timeStep", "<f8"), ("start", "<i8"), ("count", "<i8"), ("timeStepIndex", "<i8")])
+EVENT_DTYPE = np.dtype([("frame", "<i8"), ("source", "<i8"), ("target", "<i8")])
+CHUNK_MAGIC = b"PSIMCHNK"
+CHUNK_DTYPE = np.dtype([("magic", "S8"), ("frameCount", "<i8"), ("eventCount", "<i8"), ("metaLength", "<i8"), ("rowCount", "<i8")])
+
+class TrajectoryRecorder:
+    def __init__(self, path, chunkRows=1 << 16, flushInterval=2.0):
+        self.path = path
+        self.file = open(path, "wb")
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        self.file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        self.chunk = np.zeros(chunkRows, dtype=BODY_DTYPE)
+        self.chunkUsed = 0
+        self.flushInterval = flushInterval
+        self.lastFlush = time.monotonic()
+        self.bodyRows = 0
+        self.frames = []
+        self.events = []
+        self.names = {}
+        self.pendingFrames = []
+        self.pendingEvents = 0
+        self.pendingNames = {}
+        self.lastId = -1
+
+    def recordFrame(self, simulation, state):
+        count = len(state.ids)
+        for index in np.flatnonzero(state.ids > self.lastId).tolist():
+            self.pendingNames[int(state.ids[index])] = state.names[index]
+        self.lastId = max(self.lastId, int(state.ids.max(initial=-1)))
+        if count > len(self.chunk):
+            self.flush()
+            rows = np.empty(count, dtype=BODY_DTYPE)
+        else:
+            if self.chunkUsed + count > len(self.chunk):
+                self.flush()
+            rows = self.chunk[self.chunkUsed:self.chunkUsed + count]
+        self.pendingFrames.append((simulation.elapsedTime, simulation.timeStep, self.chunkUsed, count, simulation.timeStepIndex))
+        rows["id"] = state.ids
+        rows["position"] = state.positions
+        rows["velocity"] = state.velocities
+        rows["acceleration"] = state.accelerations
+        rows["mass"] = state.masses
+        rows["radius"] = state.radii
+        rows["colour"] = state.colours
+        self.bodyRows += count
+        if rows.base is self.chunk:
+            self.chunkUsed += count
+            if time.monotonic() - self.lastFlush >= self.flushInterval:
+                self.flush()
+        else:
+            self.writeChunk(rows)
+
+    def recordMerge(self, sourceIds, targetId):
+        frame = len(self.frames) + len(self.pendingFrames)
+        self.events.extend((frame, sourceId, targetId) for sourceId in sourceIds)
+        self.pendingEvents += len(sourceIds)
+
+    def flush(self):
+        if self.pendingFrames or self.pendingEvents or self.pendingNames:
+            self.writeChunk(self.chunk[:self.chunkUsed])
+            self.chunkUsed = 0
+
+    # Each chunk carries its own frame index, merges and names so a recording cut short can still be replayed.
+    def writeChunk(self, rows):
+        frames = np.array(self.pendingFrames, dtype=FRAME_DTYPE)
+        events = np.array(self.events[len(self.events) - self.pendingEvents:], dtype=EVENT_DTYPE)
+        meta = json.dumps({str(bodyId): name for bodyId, name in self.pendingNames.items()}).encode()
+        chunk = np.zeros(1, dtype=CHUNK_DTYPE)
+        chunk["magic"] = CHUNK_MAGIC
+        chunk["frameCount"] = len(frames)
+        chunk["eventCount"] = len(events)
+        chunk["metaLength"] = len(meta)
+        chunk["rowCount"] = len(rows)
+        rowOffset = self.file.tell() + CHUNK_DTYPE.itemsize + frames.nbytes + events.nbytes + len(meta)
+        frames["start"] = rowOffset + frames["start"] * BODY_DTYPE.itemsize
+        self.file.write(chunk.tobytes())
+        self.file.write(frames.tobytes())
+        self.file.write(events.tobytes())
+        self.file.write(meta)
+        self.file.write(rows.tobytes())
+        self.file.flush()
+        self.frames.extend(frames.tolist())
+        self.names.update(self.pendingNames)
+        self.pendingFrames = []
+        self.pendingEvents = 0
+        self.pendingNames = {}
+        self.lastFlush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        frames = np.array(self.frames, dtype=FRAME_DTYPE)
+        events = np.array(self.events, dtype=EVENT_DTYPE)
+        meta = json.dumps({"names": {str(bodyId): name for bodyId, name in self.names.items()}}).encode()
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["bodyRows"] = self.bodyRows
+        header["frameCount"] = len(frames)
+        header["eventCount"] = len(events)
+        header["frameOffset"] = self.file.tell()
+        self.file.write(frames.tobytes())
+        header["eventOffset"] = self.file.tell()
+        self.file.write(events.tobytes())
+        header["metaOffset"] = self.file.tell()
+        header["metaLength"] = len(meta)
+        self.file.write(meta)
+        self.file.seek(0)
+        self.file.write(header.tobytes())
+        self.file.close()
+
+def mapArray(data, dtype, offset, count):
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+
+class Trajectory:
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a trajectory recording")
+        header = header[0]
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        if header["frameOffset"] > 0:
+            self.frames = mapArray(self.data, FRAME_DTYPE, int(header["frameOffset"]), int(header["frameCount"]))
+            self.events = mapArray(self.data, EVENT_DTYPE, int(header["eventOffset"]), int(header["eventCount"]))
+            start = int(header["metaOffset"])
+            meta = json.loads(self.data[start:start + int(header["metaLength"])].tobytes())
+            self.names = {int(bodyId): name for bodyId, name in meta["names"].items()}
+        else:
+            self.recoverChunks()
+        self.mergedInto = {int(source): int(target) for source, target in zip(self.events["source"], self.events["target"])}
+        if len(self.frames) == 0:
+            raise ValueError(f"{path} contains no frames")
+
+    # Without a footer the recorder never closed, so rebuild the index from the chunks that made it to disk.
+    def recoverChunks(self):
+        frames, events, self.names = [], [], {}
+        offset = HEADER_SIZE
+        while offset + CHUNK_DTYPE.itemsize <= len(self.data):
+            chunk = np.frombuffer(self.data, dtype=CHUNK_DTYPE, count=1, offset=offset)[0]
+            frameCount, eventCount, metaLength, rowCount = (int(chunk[field]) for field in ("frameCount", "eventCount", "metaLength", "rowCount"))
+            end = (offset + CHUNK_DTYPE.itemsize + frameCount * FRAME_DTYPE.itemsize + eventCount * EVENT_DTYPE.itemsize
+                   + metaLength + rowCount * BODY_DTYPE.itemsize)
+            if chunk["magic"] != CHUNK_MAGIC or end > len(self.data):
+                break
+            offset += CHUNK_DTYPE.itemsize
+            frames.append(mapArray(self.data, FRAME_DTYPE, offset, frameCount))
+            offset += frameCount * FRAME_DTYPE.itemsize
+            events.append(mapArray(self.data, EVENT_DTYPE, offset, eventCount))
+            offset += eventCount * EVENT_DTYPE.itemsize
+            self.names.update({int(bodyId): name for bodyId, name in json.loads(self.data[offset:offset + metaLength].tobytes()).items()})
+            offset = end
+        self.frames = np.concatenate(frames) if frames else np.zeros(0, dtype=FRAME_DTYPE)
+        self.events = np.concatenate(events) if events else np.zeros(0, dtype=EVENT_DTYPE)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def startTime(self):
+        return float(self.frames["time"][0])
+
+    @property
+    def endTime(self):
+        return float(self.frames["time"][-1])
+
+    def indexAt(self, time):
+        index = int(np.searchsorted(self.frames["time"], time, side="right")) - 1
+        return min(max(index, 0), len(self.frames) - 1)
+
+    def rows(self, index):
+        frame = self.frames[index]
+        return mapArray(self.data, BODY_DTYPE, int(frame["start"]), int(frame["count"]))
+
+class ReplaySnapshot:
+    def __init__(self, trajectory, index, trails, orbitMinDistance):
+        rows = trajectory.rows(index)
+        frame = trajectory.frames[index]
+        self.positions = np.array(rows["position"])
+        self.velocities = np.array(rows["velocity"])
+        self.accelerations = np.array(rows["acceleration"])
+        self.masses = np.array(rows["mass"])
+        self.radii = np.array(rows["radius"])
+        self.colours = np.array(rows["colour"])
+        self.ids = np.array(rows["id"])
+        self.names = [trajectory.names.get(bodyId, str(bodyId)) for bodyId in self.ids.tolist()]
+        self.trails = [trails.setdefault(bodyId, OrbitTrail()) for bodyId in self.ids.tolist()]
+        self.orbitMinDistances = np.full(len(self.ids), orbitMinDistance)
+        self.elapsedTime = float(frame["time"])
+        self.timeStepIndex = int(frame["timeStepIndex"])
+        self.integrator = types.SimpleNamespace(name="replay")
+        self.physics = f"replay, frame {index + 1}/{len(trajectory)}"
+        self.recording = "off"
+        self.timings = {}
+        self.diagnostics = (None, 0.0, False)
+        self.warp = (1.0, 1, 0.0)
+        self.mergedInto = trajectory.mergedInto
+        self.spatialGrid = None
+        self.published = self.elapsedTime
+
+class ReplayPlayer:
+    def __init__(self, trajectory, vector, orbitMinDistance=1e8):
+        self.trajectory = trajectory
+        self.vector = vector
+        self.orbitMinDistance = orbitMinDistance
+        self.time = trajectory.startTime
+        self.speed = 1.0
+        self.paused = False
+        self.trails = {}
+        self.cache = {}
+        self.bodies = self.frame().bodies
+
+    def snapshot(self, index):
+        snapshot = self.cache.get(index)
+        if snapshot is None:
+            snapshot = ReplaySnapshot(self.trajectory, index, self.trails, self.orbitMinDistance)
+            self.cache = {key: value for key, value in self.cache.items() if abs(key - index) <= 1}
+            self.cache[index] = snapshot
+        return snapshot
+
+    def frame(self):
+        index = self.trajectory.indexAt(self.time)
+        following = min(index + 1, len(self.trajectory) - 1)
+        previous, latest = self.snapshot(index), self.snapshot(following)
+        frame = Frame(previous, latest, latest.published + self.time - previous.published, self.vector)
+        self.bodies = frame.bodies
+        return frame
+
+    def advance(self, deltaTime):
+        if self.paused:
+            return
+        timeStep = float(self.trajectory.frames["timeStep"][self.trajectory.indexAt(self.time)])
+        self.seek(self.time + timeStep * self.speed * deltaTime)
+
+    def seek(self, time):
+        time = min(max(time, self.trajectory.startTime), self.trajectory.endTime)
+        if time < self.time:
+            self.clearOrbitPoints()
+        self.time = time
+
+    def queueCommand(self, name, *args):
+        command = getattr(self, name, None)
+        if command is not None:
+            command(*args)
+
+    def seekBy(self, fraction):
+        self.seek(self.time + (self.trajectory.endTime - self.trajectory.startTime) * fraction)
+
+    def togglePause(self):
+        self.paused = not self.paused
+
+    def cycleTimeStep(self):
+        self.speed = self.speed * 2 if self.speed < 16 else 0.25
+
+    def clearOrbitPoints(self):
+        for trail in self.trails.values():
+            trail.clear()
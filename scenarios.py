@@ -0,0 +1,105 @@
+import csv
+import numpy as np
+
+G = 6.67430e-11
+AU = 1.495978707e11
+SOLAR_MASS = 1.989e30
+SCENARIO_FIELDS = ("positions", "velocities", "masses", "radii", "colours", "names")
+
+def scenario(positions, velocities, masses, radii, colours, names=None):
+    count = len(masses)
+    return {
+        "positions": np.asarray(positions, dtype=float).reshape(count, 2),
+        "velocities": np.asarray(velocities, dtype=float).reshape(count, 2),
+        "masses": np.asarray(masses, dtype=float),
+        "radii": np.broadcast_to(np.asarray(radii, dtype=float), (count,)),
+        "colours": np.broadcast_to(np.asarray(colours, dtype=np.uint8), (count, 3)),
+        "names": None if names is None else np.asarray(names, dtype=str),
+    }
+
+def combine(*scenarios):
+    combined = {field: np.concatenate([scenario[field] for scenario in scenarios]) for field in SCENARIO_FIELDS if field != "names"}
+    if any(scenario["names"] is not None for scenario in scenarios):
+        offsets = np.cumsum([0] + [len(scenario["masses"]) for scenario in scenarios])
+        combined["names"] = np.concatenate([
+            scenario["names"] if scenario["names"] is not None else np.char.add("Body ", np.arange(offset, offset + len(scenario["masses"])).astype(str))
+            for scenario, offset in zip(scenarios, offsets)
+        ])
+    else:
+        combined["names"] = None
+    return combined
+
+def saveNpz(path, scenario):
+    arrays = {field: scenario[field] for field in SCENARIO_FIELDS if scenario[field] is not None}
+    np.savez(path, **arrays)
+
+def loadNpz(path):
+    with np.load(path) as data:
+        return scenario(
+            data["positions"], data["velocities"], data["masses"], data["radii"],
+            data["colours"] if "colours" in data else (150, 150, 150),
+            data["names"] if "names" in data else None,
+        )
+
+def loadCsv(path):
+    with open(path, newline="") as file:
+        columns = next(csv.reader(file))
+        dtype = [(column, "U64" if column == "name" else float) for column in columns]
+        rows = np.atleast_1d(np.loadtxt(file, delimiter=",", dtype=dtype))
+    colours = np.stack([rows[channel] for channel in ("r", "g", "b")], axis=1) if "r" in columns else (150, 150, 150)
+    return scenario(
+        np.stack([rows["x"], rows["y"]], axis=1),
+        np.stack([rows["vx"], rows["vy"]], axis=1),
+        rows["mass"], rows["radius"], colours,
+        rows["name"] if "name" in columns else None,
+    )
+
+def loadScenarioFile(path):
+    if path.endswith(".npz"):
+        return loadNpz(path)
+    if path.endswith(".csv"):
+        return loadCsv(path)
+    raise ValueError(f"Unsupported scenario file {path}, expected .npz or .csv")
+
+def keplerianDisk(count, innerRadius, outerRadius, massRange, radiusRange, colour, centralMass=SOLAR_MASS,
+                  densityExponent=1.0, velocityDispersion=0.01, G=G, seed=None, namePrefix="Body"):
+    rng = np.random.default_rng(seed)
+    # Inverse CDF of a surface density falling as r**-densityExponent.
+    power = 2 - densityExponent
+    u = rng.random(count)
+    if abs(power) < 1e-12:
+        distances = innerRadius * (outerRadius / innerRadius) ** u
+    else:
+        distances = (innerRadius ** power + u * (outerRadius ** power - innerRadius ** power)) ** (1 / power)
+    angles = rng.uniform(0, 2 * np.pi, count)
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    speeds = np.sqrt(G * centralMass / distances) * (1 + velocityDispersion * rng.standard_normal(count))
+    positions = directions * distances[:, np.newaxis]
+    velocities = np.stack([-directions[:, 1], directions[:, 0]], axis=1) * speeds[:, np.newaxis]
+    masses = np.exp(rng.uniform(np.log(massRange[0]), np.log(massRange[1]), count))
+    radii = np.exp(rng.uniform(np.log(radiusRange[0]), np.log(radiusRange[1]), count))
+    names = np.char.add(f"{namePrefix} ", np.arange(1, count + 1).astype(str))
+    return scenario(positions, velocities, masses, radii, colour, names)
+
+def centralStar(mass=SOLAR_MASS, radius=6.9634e8, colour=(255, 255, 0), name="Sun"):
+    return scenario([(0, 0)], [(0, 0)], [mass], [radius], colour, [name])
+
+def asteroidBelt(count, centralMass=SOLAR_MASS, G=G, seed=None):
+    return keplerianDisk(count, 2.2 * AU, 3.3 * AU, (1e12, 1e20), (1e3, 5e5), (120, 110, 100),
+                         centralMass, densityExponent=0.0, velocityDispersion=0.02, G=G, seed=seed, namePrefix="Asteroid")
+
+def kuiperBelt(count, centralMass=SOLAR_MASS, G=G, seed=None):
+    return keplerianDisk(count, 30 * AU, 50 * AU, (1e15, 1e22), (1e4, 1e6), (90, 110, 140),
+                         centralMass, densityExponent=0.0, velocityDispersion=0.03, G=G, seed=seed, namePrefix="KBO")
+
+def protoplanetaryDisk(count, centralMass=SOLAR_MASS, G=G, seed=None):
+    disk = keplerianDisk(count, 0.1 * AU, 40 * AU, (1e18, 1e24), (1e4, 6e6), (150, 150, 150),
+                         centralMass, densityExponent=1.5, velocityDispersion=0.005, G=G, seed=seed, namePrefix="Planetesimal")
+    return combine(centralStar(centralMass), disk)
+
+# Belts are added to the existing solar system, the disk replaces it.
+GENERATORS = {
+    "asteroidBelt": (asteroidBelt, True),
+    "kuiperBelt": (kuiperBelt, True),
+    "disk": (protoplanetaryDisk, False),
+}
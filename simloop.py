@@ -0,0 +1,197 @@
+import threading
+import time
+import numpy as np
+from trails import OrbitTrail
+from spatialindex import SpatialGrid
+
+class Snapshot:
+    def __init__(self, simulation, state):
+        self.positions = state.positions.copy()
+        self.velocities = state.velocities.copy()
+        self.accelerations = state.accelerations.copy()
+        self.masses = state.masses.copy()
+        self.radii = state.radii.copy()
+        self.colours = state.colours.copy()
+        self.ids = state.ids.copy()
+        self.names = state.names
+        self.trails = state.trails
+        self.orbitMinDistances = state.orbitMinDistances.copy()
+        self.elapsedTime = simulation.elapsedTime
+        self.timeStepIndex = simulation.timeStepIndex
+        self.integrator = simulation.integrator
+        self.physics = simulation.describePhysics()
+        self.recording = simulation.describeRecording()
+        self.timings = simulation.phaseAverages()
+        self.diagnostics = simulation.latestDiagnostics()
+        self.warp = simulation.warpStatus()
+        self.mergedInto = simulation.mergedInto
+        self.spatialGrid = None
+        self.published = time.perf_counter()
+
+class FrameBody:
+    def __init__(self, frame, index):
+        self.frame = frame
+        self.index = index
+        self.bodyName = frame.snapshot.names[index]
+        self.orbitMinDistance = float(frame.snapshot.orbitMinDistances[index])
+
+    def __eq__(self, other):
+        return isinstance(other, FrameBody) and other.frame is self.frame and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.frame), self.index))
+
+    @property
+    def orbitPoints(self):
+        trails = self.frame.snapshot.trails
+        if trails[self.index] is None:
+            trails[self.index] = OrbitTrail()
+        return trails[self.index]
+
+    @property
+    def position(self):
+        return self.frame.vector(*self.frame.positions[self.index].tolist())
+
+    @property
+    def velocity(self):
+        return self.frame.vector(*self.frame.snapshot.velocities[self.index].tolist())
+
+    @property
+    def lastAcceleration(self):
+        return self.frame.vector(*self.frame.snapshot.accelerations[self.index].tolist())
+
+    @property
+    def mass(self):
+        return float(self.frame.snapshot.masses[self.index])
+
+    @property
+    def bodyRadius(self):
+        return int(self.frame.snapshot.radii[self.index])
+
+    @property
+    def colour(self):
+        return tuple(self.frame.snapshot.colours[self.index].tolist())
+
+class FrameBodies:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __len__(self):
+        return len(self.frame.snapshot.names)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return FrameBody(self.frame, index)
+
+    def __iter__(self):
+        return (FrameBody(self.frame, i) for i in range(len(self)))
+
+class Frame:
+    def __init__(self, previous, latest, now, vector):
+        self.vector = vector
+        interval = latest.published - previous.published
+        alpha = 1.0 if interval <= 0 else min(max((now - latest.published) / interval, 0.0), 1.0)
+        if alpha < 1 and np.array_equal(previous.ids, latest.ids):
+            self.snapshot = latest
+            self.positions = previous.positions + (latest.positions - previous.positions) * alpha
+            self.elapsedTime = previous.elapsedTime + (latest.elapsedTime - previous.elapsedTime) * alpha
+        else:
+            # Bodies merged in between, so show whichever snapshot is nearer rather than blending.
+            self.snapshot = previous if alpha < 0.5 else latest
+            self.positions = self.snapshot.positions
+            self.elapsedTime = self.snapshot.elapsedTime
+        self.timeStepIndex = latest.timeStepIndex
+        self.integrator = latest.integrator
+        self.bodies = FrameBodies(self)
+
+    def describePhysics(self):
+        return self.snapshot.physics
+
+    def describeRecording(self):
+        return self.snapshot.recording
+
+    def phaseAverages(self):
+        return self.snapshot.timings
+
+    def latestDiagnostics(self):
+        return self.snapshot.diagnostics
+
+    def warpStatus(self):
+        return self.snapshot.warp
+
+    def bodyIds(self):
+        return self.snapshot.ids
+
+    def mergeTarget(self, bodyId):
+        return self.snapshot.mergedInto.get(bodyId)
+
+    # Trails are drawn and extended by the renderer, so clearing them never touches simulation state.
+    def clearOrbitPoints(self):
+        for trail in self.snapshot.trails:
+            if trail is not None:
+                trail.clear()
+
+    # Built on first use and shared by every frame drawn from the same snapshot.
+    def spatialIndex(self):
+        snapshot = self.snapshot
+        if snapshot.spatialGrid is None:
+            snapshot.spatialGrid = SpatialGrid(snapshot.positions, snapshot.radii, snapshot.masses)
+        return snapshot.spatialGrid
+
+    def bodyArrays(self):
+        return self.positions, self.snapshot.velocities, self.snapshot.radii, self.snapshot.colours
+
+class SimulationLoop:
+    def __init__(self, simulation, vector, tickRate=120, maxDeltaTime=0.25, budgetFraction=0.75):
+        self.simulation = simulation
+        self.vector = vector
+        self.tickRate = tickRate
+        self.budgetFraction = budgetFraction
+        self.maxDeltaTime = maxDeltaTime
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.error = None
+        snapshot = simulation.snapshot()
+        self.previous = snapshot
+        self.latest = snapshot
+        self.thread = threading.Thread(target=self.run, name="simulation", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def run(self):
+        interval = 1 / self.tickRate
+        lastTick = time.perf_counter()
+        try:
+            while not self.stopping.is_set():
+                now = time.perf_counter()
+                self.simulation.step(min(now - lastTick, self.maxDeltaTime), interval * self.budgetFraction)
+                lastTick = now
+                snapshot = self.simulation.snapshot()
+                with self.lock:
+                    self.previous, self.latest = self.latest, snapshot
+                remaining = interval - (time.perf_counter() - now)
+                if remaining > 0:
+                    self.stopping.wait(remaining)
+        except Exception as error:
+            self.error = error
+
+    def latestSnapshot(self):
+        with self.lock:
+            return self.latest
+
+    def frame(self):
+        if self.error is not None:
+            raise self.error
+        with self.lock:
+            previous, latest = self.previous, self.latest
+        return Frame(previous, latest, time.perf_counter(), self.vector)
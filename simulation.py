@@ -0,0 +1,760 @@
+import math
+import queue
+import time
+import numpy as np
+from kernels import directAccelerationsAndPotentials, potentialEnergy
+from barneshut import barnesHutAccelerationsAndPotentials, measureAccelerationError
+from integrators import INTEGRATORS, createIntegrator
+from collisions import findCollisionGroups
+from trails import OrbitTrail
+from parallel import ParallelForceBackend
+from simloop import Snapshot
+from recording import TrajectoryRecorder
+from timing import PhaseTimer
+from scenarios import GENERATORS, loadScenarioFile
+from diagnostics import ConservationMonitor
+from spatialindex import SpatialGrid
+
+BLACK = (0, 0, 0)
+RED = (255, 0 ,0)
+YELLOW = (255, 255, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+BROWN = (80, 80, 80)
+WHITE = (255,255,255)
+LIGHTGREY = (150, 150, 150)
+LIGHTBLUE = (0, 0, 150)
+GREY = (21, 21, 21)
+
+class Vector2D:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"Vector2D({self.x}, {self.y})"
+
+    def __add__(self, other):
+        return Vector2D(self.x + other.x, self.y + other.y)
+    
+    def __sub__(self, other):
+        return Vector2D(self.x - other.x, self.y - other.y)
+    
+    def __mul__(self, scalar):
+        return Vector2D(self.x * scalar, self.y * scalar)
+
+    def __truediv__(self, other):
+        return Vector2D(self.x / other, self.y / other)
+    
+    def __neg__(self):
+        return Vector2D(-self.x, -self.y)
+
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+        return self
+
+    def copy(self):
+        return Vector2D(self.x, self.y)
+
+    def iadd(self, other):
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def imul(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def addScaled(self, other, scalar):
+        self.x += other.x * scalar
+        self.y += other.y * scalar
+        return self
+
+    def tuple(self):
+        return (self.x, self.y)
+    
+    def castInt(self):
+        return Vector2D(int(self.x), int(self.y))
+
+    def magnitude(self): 
+        return (self.x**2 + self.y**2) ** 0.5
+
+    def squaredMagnitude(self):
+        return (self.x**2 + self.y**2)
+
+    def normalise(self): 
+        mag = self.magnitude()
+        if mag == 0:
+            return Vector2D(0, 0)
+        return Vector2D(self.x / mag, self.y / mag)
+
+# Copies read out of the body arrays, so an in-place edit would be silently lost; assign a whole vector instead.
+class FrozenVector2D(Vector2D):
+    __slots__ = ()
+
+    def __init__(self, x, y):
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Can't set {name} on a copy of array state, assign the whole vector to the body instead")
+
+class Body:
+    nextId = 0
+
+    def __init__(self, distance, mass, bodyRadius, colour, bodyName):
+        self.bodyId = Body.allocateIds(1)[0]
+        self.position = Vector2D(distance, 0)
+        self.mass = mass
+        self.velocity = Vector2D(0, 0)
+        self.acceleration = Vector2D(0, 0)
+        self.lastAcceleration = Vector2D(0, 0)
+        
+        self.colour = colour
+        self.bodyRadius = int(bodyRadius)
+        self.orbitMinDistance = 1e8
+        self.orbitPoints = OrbitTrail()
+        self.bodyName = bodyName
+
+    @staticmethod
+    def allocateIds(count):
+        ids = np.arange(Body.nextId, Body.nextId + count, dtype=np.int64)
+        Body.nextId += count
+        return ids
+
+    def kick(self, deltaTime):
+        self.velocity.addScaled(self.lastAcceleration, deltaTime)
+
+    def drift(self, deltaTime):
+        self.position.addScaled(self.velocity, deltaTime)
+
+    def resolveForces(self):
+        self.lastAcceleration, self.acceleration = self.acceleration, self.lastAcceleration
+        self.acceleration.set(0.0, 0.0)
+
+class BodyView:
+    __slots__ = ("state", "index")
+
+    def __init__(self, state, index):
+        self.state = state
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, BodyView) and other.state is self.state and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.state), self.index))
+
+    @property
+    def position(self):
+        return FrozenVector2D(*self.state.positions[self.index].tolist())
+
+    @position.setter
+    def position(self, value):
+        self.state.positions[self.index] = value.tuple()
+
+    @property
+    def velocity(self):
+        return FrozenVector2D(*self.state.velocities[self.index].tolist())
+
+    @velocity.setter
+    def velocity(self, value):
+        self.state.velocities[self.index] = value.tuple()
+
+    @property
+    def lastAcceleration(self):
+        return FrozenVector2D(*self.state.accelerations[self.index].tolist())
+
+    @property
+    def mass(self):
+        return float(self.state.masses[self.index])
+
+    @mass.setter
+    def mass(self, value):
+        self.state.masses[self.index] = value
+
+    @property
+    def bodyRadius(self):
+        return int(self.state.radii[self.index])
+
+    @property
+    def colour(self):
+        return tuple(self.state.colours[self.index].tolist())
+
+    @colour.setter
+    def colour(self, value):
+        self.state.colours[self.index] = value
+
+    @property
+    def bodyId(self):
+        return int(self.state.ids[self.index])
+
+    @property
+    def bodyName(self):
+        return self.state.names[self.index]
+
+    @property
+    def orbitMinDistance(self):
+        return float(self.state.orbitMinDistances[self.index])
+
+    @property
+    def orbitPoints(self):
+        return self.state.trail(self.index)
+
+    def detach(self):
+        body = Body(0, self.mass, self.bodyRadius, self.colour, self.bodyName)
+        body.position = Vector2D(*self.state.positions[self.index].tolist())
+        body.velocity = Vector2D(*self.state.velocities[self.index].tolist())
+        body.lastAcceleration = Vector2D(*self.state.accelerations[self.index].tolist())
+        body.orbitMinDistance = self.orbitMinDistance
+        body.orbitPoints = self.orbitPoints
+        body.bodyId = self.bodyId
+        return body
+
+class BodyViews:
+    def __init__(self, state):
+        self.state = state
+
+    def __len__(self):
+        return len(self.state.masses)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return BodyView(self.state, index)
+
+    def __iter__(self):
+        return (BodyView(self.state, i) for i in range(len(self)))
+
+class BodyArrays:
+    def __init__(self, bodies):
+        self.positions = np.array([body.position.tuple() for body in bodies], dtype=float).reshape(-1, 2)
+        self.velocities = np.array([body.velocity.tuple() for body in bodies], dtype=float).reshape(-1, 2)
+        self.accelerations = np.array([body.lastAcceleration.tuple() for body in bodies], dtype=float).reshape(-1, 2)
+        self.masses = np.array([body.mass for body in bodies], dtype=float)
+        self.radii = np.array([body.bodyRadius for body in bodies], dtype=float)
+        self.colours = np.array([body.colour for body in bodies], dtype=np.uint8).reshape(-1, 3)
+        self.ids = np.array([body.bodyId for body in bodies], dtype=np.int64)
+        self.orbitMinDistances = np.array([body.orbitMinDistance for body in bodies], dtype=float)
+        self.names = [body.bodyName for body in bodies]
+        self.trails = [body.orbitPoints for body in bodies]
+        self.views = BodyViews(self)
+
+    @classmethod
+    def fromArrays(cls, positions, velocities, masses, radii, colours, names=None, orbitMinDistance=1e8):
+        state = cls([])
+        state.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        state.velocities = np.array(velocities, dtype=float).reshape(-1, 2)
+        state.accelerations = np.zeros_like(state.positions)
+        state.masses = np.array(masses, dtype=float)
+        state.radii = np.array(radii, dtype=float)
+        state.colours = np.array(colours, dtype=np.uint8).reshape(-1, 3)
+        state.ids = Body.allocateIds(len(state.masses))
+        state.orbitMinDistances = np.full(len(state.masses), orbitMinDistance)
+        state.names = [f"Body {bodyId}" for bodyId in state.ids.tolist()] if names is None else np.asarray(names, dtype=str).tolist()
+        state.trails = [None] * len(state.masses)
+        return state
+
+    def trail(self, index):
+        trail = self.trails[index]
+        if trail is None:
+            trail = self.trails[index] = OrbitTrail()
+        return trail
+
+    def extend(self, other, keep=None):
+        if keep is None:
+            keep = np.ones(len(self.masses), dtype=bool)
+        kept = np.flatnonzero(keep).tolist()
+        self.positions = np.concatenate([self.positions[keep], other.positions])
+        self.velocities = np.concatenate([self.velocities[keep], other.velocities])
+        self.accelerations = np.concatenate([self.accelerations[keep], other.accelerations])
+        self.masses = np.concatenate([self.masses[keep], other.masses])
+        self.radii = np.concatenate([self.radii[keep], other.radii])
+        self.colours = np.concatenate([self.colours[keep], other.colours])
+        self.ids = np.concatenate([self.ids[keep], other.ids])
+        self.orbitMinDistances = np.concatenate([self.orbitMinDistances[keep], other.orbitMinDistances])
+        self.names = [self.names[i] for i in kept] + other.names
+        self.trails = [self.trails[i] for i in kept] + other.trails
+
+    def compact(self, keep, newBodies):
+        self.extend(BodyArrays(newBodies), keep)
+
+class Simulation:
+    def __init__(self, timeStepIndex, G, vectorized=False, forceSolver="direct", theta=0.5, integrator="euler", workerCount=None, maxStepSize=None):
+        self.timeStepOptions = [1, 60, 60 * 60, 24 * 60 * 60, 30.4 * 24 * 60 * 60]
+        self.timeStepIndex = timeStepIndex
+        self.timeStep = self.timeStepOptions[timeStepIndex]
+        self.G = G
+        self.forceSolver = forceSolver
+        self.theta = theta
+        self.workerCount = workerCount
+        self.parallelBackend = None
+        self.recorder = None
+        self.timings = PhaseTimer(("forces", "integrate", "collisions", "record", "diagnostics"))
+        self.integrator = createIntegrator(integrator)
+        self.forcesStale = True
+        self.potentialEnergy = None
+        self.evaluatedPotential = None
+        self.diagnostics = ConservationMonitor()
+        self.diagnosticsInterval = 16
+        self.stepsSinceDiagnostics = 0
+        self.maxStepSize = maxStepSize
+        self.reducedStepSize = None
+        self.subSteps = 1
+        self.stepSize = 0.0
+        self.requestedTime = 0.0
+        self.simulatedTime = 0.0
+        self.commands = queue.Queue()
+        self.elapsedTime = 0
+        self.mergedInto = {}
+        self.bodies = []
+        self.state = None
+        self.vectorized = False
+        self.initBodies()
+        self.setVectorized(vectorized or forceSolver != "direct" or self.integrator.requiresArrays)
+        self.setForceSolver(forceSolver)
+        self.bodyAmount = len(self.bodies)
+
+    def setVectorized(self, vectorized):
+        if vectorized:
+            self.state = BodyArrays(self.bodies)
+            self.bodies = self.state.views
+        elif self.state is not None:
+            self.bodies = [body.detach() if isinstance(body, BodyView) else body for body in self.bodies]
+            self.state = None
+            self.setForceSolver("direct")
+            if self.integrator.requiresArrays:
+                self.integrator = createIntegrator("euler")
+        self.vectorized = vectorized
+        self.forcesStale = True
+
+    def setForceSolver(self, forceSolver):
+        if forceSolver != "direct" and not self.vectorized:
+            self.setVectorized(True)
+        if forceSolver == "parallel" and self.parallelBackend is None:
+            self.parallelBackend = ParallelForceBackend(self.workerCount)
+        elif forceSolver != "parallel" and self.parallelBackend is not None:
+            self.parallelBackend.close(self.state)
+            self.parallelBackend = None
+        self.forceSolver = forceSolver
+        self.forcesStale = True
+
+    def close(self):
+        self.stopRecording()
+        self.timings.setEnabled(False)
+        if self.parallelBackend is not None:
+            self.parallelBackend.close(self.state)
+            self.parallelBackend = None
+
+    def setIntegrator(self, name):
+        integrator = createIntegrator(name)
+        if not integrator.supports(len(self.bodies)):
+            return
+        self.integrator = integrator
+        if self.integrator.requiresArrays and not self.vectorized:
+            self.setVectorized(True)
+        self.forcesStale = True
+
+    def computeAccelerations(self, positions=None, masses=None):
+        with self.timings.measure("forces"):
+            if self.forceSolver == "parallel":
+                if positions is None:
+                    accelerations, potentials = self.parallelBackend.stateAccelerations(self.state, self.G)
+                else:
+                    accelerations, potentials = self.parallelBackend.accelerations(positions, masses, self.G)
+            else:
+                if positions is None:
+                    positions, masses = self.state.positions, self.state.masses
+                if self.forceSolver == "barnesHut":
+                    accelerations, potentials = barnesHutAccelerationsAndPotentials(positions, masses, self.G, self.theta)
+                else:
+                    accelerations, potentials = directAccelerationsAndPotentials(positions, masses, self.G)
+            masses = self.state.masses if masses is None else masses
+            self.evaluatedPotential = 0.5 * float(masses @ potentials)
+            return accelerations
+
+    def queueCommand(self, name, *args):
+        self.commands.put((name, args))
+
+    def processCommands(self):
+        while True:
+            try:
+                name, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            # Replay-only commands such as seekBy arrive here too when bound keys are pressed in a live run.
+            command = getattr(self, name, None)
+            if command is not None:
+                command(*args)
+
+    def scaleMass(self, bodyId, factor):
+        matches = np.flatnonzero(self.bodyIds() == bodyId)
+        if len(matches):
+            self.bodies[int(matches[0])].mass *= factor
+            self.forcesStale = True
+            self.resetConservation()
+
+    def resetConservation(self):
+        self.potentialEnergy = None
+        self.diagnostics.reset()
+
+    def toggleAutoStepReduction(self):
+        self.diagnostics.autoReduce = not self.diagnostics.autoReduce
+        if not self.diagnostics.autoReduce:
+            self.reducedStepSize = None
+        self.diagnostics.reset()
+
+    def latestDiagnostics(self):
+        return self.diagnostics.latest, self.diagnostics.maxDrift(), self.diagnostics.autoReduce
+
+    def cycleTimeStep(self):
+        self.timeStepIndex = (self.timeStepIndex + 1) % len(self.timeStepOptions)
+        self.timeStep = self.timeStepOptions[self.timeStepIndex]
+
+    def cycleIntegrator(self):
+        names = list(INTEGRATORS)
+        start = names.index(self.integrator.name)
+        for offset in range(1, len(names)):
+            name = names[(start + offset) % len(names)]
+            if INTEGRATORS[name]().supports(len(self.bodies)):
+                self.setIntegrator(name)
+                return
+
+    def toggleVectorized(self):
+        self.setVectorized(not self.vectorized)
+
+    def toggleTimings(self):
+        self.timings.setEnabled(not self.timings.enabled)
+
+    def toggleTimingExport(self):
+        if not self.timings.enabled:
+            return
+        if self.timings.csvFile is None:
+            self.timings.startCsv(time.strftime("timings-physics-%Y%m%d-%H%M%S.csv"))
+        else:
+            self.timings.stopCsv()
+
+    def phaseAverages(self):
+        return self.timings.averages()
+
+    def toggleBarnesHut(self):
+        self.setForceSolver("direct" if self.forceSolver == "barnesHut" else "barnesHut")
+
+    def startRecording(self, path=None):
+        self.stopRecording()
+        self.recorder = TrajectoryRecorder(path or time.strftime("trajectory-%Y%m%d-%H%M%S.trj"))
+        self.recordFrame()
+
+    def stopRecording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def toggleRecording(self):
+        if self.recorder is None:
+            self.startRecording()
+        else:
+            self.stopRecording()
+
+    def recordFrame(self):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        self.recorder.recordFrame(self, state)
+
+    def describePhysics(self):
+        if not self.vectorized:
+            return "pairwise"
+        if self.integrator.name == "block":
+            return "vectorized, direct sum (block timesteps)"
+        if self.forceSolver == "barnesHut":
+            return f"vectorized, Barnes-Hut (theta {self.theta})"
+        if self.forceSolver == "parallel":
+            return f"vectorized, parallel ({self.parallelBackend.workerCount} workers)"
+        return "vectorized, direct sum"
+
+    def describeRecording(self):
+        return "off" if self.recorder is None else self.recorder.path
+
+    def snapshot(self):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        return Snapshot(self, state)
+
+    def totalEnergy(self):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        kinetic = 0.5 * float(state.masses @ np.einsum("ij,ij->i", state.velocities, state.velocities))
+        return kinetic + potentialEnergy(state.positions, state.masses, self.G)
+
+    def measureParallelSpeedup(self, repeats=3):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        backend = self.parallelBackend or ParallelForceBackend(self.workerCount)
+        try:
+            return backend.measureSpeedup(state.positions, state.masses, self.G, repeats)
+        finally:
+            if backend is not self.parallelBackend:
+                backend.close()
+
+    def bodyIds(self):
+        if self.vectorized:
+            return self.state.ids
+        return np.array([body.bodyId for body in self.bodies], dtype=np.int64)
+
+    def mergeTarget(self, bodyId):
+        return self.mergedInto.get(bodyId)
+
+    def spatialIndex(self):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        return SpatialGrid(state.positions, state.radii, state.masses)
+
+    def bodyArrays(self):
+        if self.vectorized:
+            return self.state.positions, self.state.velocities, self.state.radii, self.state.colours
+        state = BodyArrays(self.bodies)
+        return state.positions, state.velocities, state.radii, state.colours
+
+    def measureForceError(self, sampleSize=1000):
+        state = self.state if self.vectorized else BodyArrays(self.bodies)
+        return measureAccelerationError(state.positions, state.masses, self.G, self.theta, sampleSize)
+
+    def setBodies(self, bodies):
+        self.bodies = list(bodies)
+        self.state = None
+        if self.vectorized:
+            self.setVectorized(True)
+        self.bodyAmount = len(self.bodies)
+        self.forcesStale = True
+        self.resetConservation()
+
+    def loadScenario(self, scenario, keepBodies=False):
+        state = BodyArrays.fromArrays(**scenario)
+        if keepBodies:
+            base = self.state if self.vectorized else BodyArrays(self.bodies)
+            base.extend(state)
+            state = base
+        self.state = state
+        self.bodies = state.views
+        self.vectorized = True
+        self.bodyAmount = len(self.bodies)
+        if not self.integrator.supports(self.bodyAmount):
+            self.setIntegrator("leapfrog")
+        self.forcesStale = True
+        self.resetConservation()
+
+    def initBodies(self):
+        self.bodies = [
+            Body(0, 1.989e30, 6.9634e8, YELLOW, "Sun"),
+            Body(5.791e10, 3.301e23, 2.4397e6  , LIGHTGREY, "Mercury"),
+            Body(1.0821e11, 4.87e24 , 6.05e6  , BROWN, "Venus"),
+            Body(1.4959787e11, 5.972e24, 6.371e6  , BLUE, "Earth"),
+            Body(1.4959787e11 + 3.844e8, 7.348e22, 1.7374e6, BROWN, "Moon"),
+            Body(2.279e11, 6.39e23 , 3.3895e6 , RED, "Mars"),
+            Body(7.786e11, 1.898e27, 6.9911e7, LIGHTGREY, "Jupiter"),
+            Body(1.4392e12, 5.683e26, 5.8232e7, RED, "Saturn"),
+            Body(4.471e12, 1.024e26, 2.4622e7, BLUE, "Neptune"),
+            Body(2.9233e12, 8.681e25, 2.5362e7, LIGHTBLUE, "Uranus"),
+        ]
+        for i in range(1, len(self.bodies)):
+            self.bodies[i].velocity = calculateOrbitalVelocity(self.bodies[0], self.bodies[i], self.G)
+        self.bodies[4].velocity += calculateOrbitalVelocity(self.bodies[3], self.bodies[4], self.G)
+
+    def stepLimit(self):
+        limits = [limit for limit in (self.maxStepSize, self.reducedStepSize) if limit is not None]
+        return min(limits) if limits else None
+
+    def step(self, deltaTime, budget=None):
+        self.processCommands()
+        totalStep = self.timeStep * deltaTime
+        limit = self.stepLimit()
+        subSteps = 1 if limit is None else max(1, math.ceil(abs(totalStep) / limit))
+        stepSize = totalStep / subSteps
+        start = time.perf_counter()
+        completed = 0
+        # Whatever does not fit in the wall-clock budget is dropped rather than carried into the next frame.
+        while completed < subSteps:
+            with self.timings.measure("integrate"):
+                self.integrator.step(self, stepSize)
+            with self.timings.measure("collisions"):
+                self.resolveCollisions()
+            completed += 1
+            if budget is not None and time.perf_counter() - start > budget:
+                break
+        self.elapsedTime += stepSize * completed
+        self.subSteps = completed
+        self.stepSize = stepSize
+        self.requestedTime = self.requestedTime * 0.9 + abs(totalStep)
+        self.simulatedTime = self.simulatedTime * 0.9 + abs(stepSize) * completed
+        if self.recorder is not None:
+            with self.timings.measure("record"):
+                self.recordFrame()
+        with self.timings.measure("diagnostics"):
+            self.updateDiagnostics(stepSize)
+        self.timings.endFrame()
+
+    def warpStatus(self):
+        warpRatio = self.simulatedTime / self.requestedTime if self.requestedTime > 0 else 1.0
+        return warpRatio, self.subSteps, self.stepSize
+
+    def updateDiagnostics(self, stepSize):
+        self.stepsSinceDiagnostics += 1
+        if self.potentialEnergy is None:
+            # Integrators that open with a kick reuse this evaluation next step; for the rest it is extra work, so sample.
+            if not self.integrator.startsWithKick() and self.stepsSinceDiagnostics < self.diagnosticsInterval:
+                return
+            self.updateAccelerations()
+        self.stepsSinceDiagnostics = 0
+        if self.vectorized:
+            self.diagnostics.record(self.elapsedTime, self.state.positions, self.state.velocities, self.state.masses, self.potentialEnergy, stepSize)
+        else:
+            self.diagnostics.recordTotals(self.elapsedTime, *bodyTotals(self.bodies, self.potentialEnergy), stepSize)
+        if self.diagnostics.exceeded():
+            self.reducedStepSize = stepSize / 2
+            self.diagnostics.reset()
+        elif self.reducedStepSize is not None and self.diagnostics.relaxable():
+            self.reducedStepSize *= 2
+            if self.maxStepSize is not None and self.reducedStepSize >= self.maxStepSize:
+                self.reducedStepSize = None
+            self.diagnostics.reset()
+
+    def updateAccelerations(self):
+        if self.vectorized:
+            self.state.accelerations = self.computeAccelerations()
+            self.potentialEnergy = self.evaluatedPotential
+        else:
+            with self.timings.measure("forces"):
+                self.potentialEnergy = accumulatePairForces(self.bodies, self.G)
+            for body in self.bodies:
+                body.resolveForces()
+        self.forcesStale = False
+
+    def kick(self, deltaTime):
+        if self.forcesStale:
+            self.updateAccelerations()
+        if self.vectorized:
+            self.state.velocities += self.state.accelerations * deltaTime
+        else:
+            for body in self.bodies:
+                body.kick(deltaTime)
+
+    def drift(self, deltaTime):
+        if self.vectorized:
+            self.state.positions += self.state.velocities * deltaTime
+        else:
+            for body in self.bodies:
+                body.drift(deltaTime)
+        self.forcesStale = True
+        self.potentialEnergy = None
+    
+    def resolveCollisions(self):
+        while True:
+            if self.vectorized:
+                positions, radii = self.state.positions, self.state.radii
+            else:
+                positions = np.array([body.position.tuple() for body in self.bodies], dtype=float).reshape(-1, 2)
+                radii = np.array([body.bodyRadius for body in self.bodies], dtype=float)
+            groups = findCollisionGroups(positions, radii)
+            if not groups:
+                return
+            self.combineBodies(groups)
+
+    def combineBodies(self, groups):
+        mergedBodies = [self.mergeGroup([self.bodies[i] for i in group]) for group in groups]
+        for group, merged in zip(groups, mergedBodies):
+            for i in group:
+                self.mergedInto[self.bodies[i].bodyId] = merged.bodyId
+            if self.recorder is not None:
+                self.recorder.recordMerge([self.bodies[i].bodyId for i in group], merged.bodyId)
+        keep = np.ones(len(self.bodies), dtype=bool)
+        keep[np.concatenate(groups)] = False
+        if self.vectorized:
+            self.state.compact(keep, mergedBodies)
+            self.bodies = self.state.views
+        else:
+            self.bodies = [body for body, kept in zip(self.bodies, keep) if kept] + mergedBodies
+        self.bodyAmount = len(self.bodies)
+        self.forcesStale = True
+        self.resetConservation()
+
+    def mergeGroup(self, bodies):
+        combinedMass = sum(body.mass for body in bodies)
+        newPosition = Vector2D(0, 0)
+        newVelocity = Vector2D(0, 0)
+        for body in bodies:
+            newPosition += body.position * body.mass
+            newVelocity += body.velocity * body.mass
+        newRadius = math.sqrt(sum(body.bodyRadius**2 for body in bodies))
+        newColour = combineColours([body.colour for body in bodies])
+        newName = "-".join(body.bodyName for body in bodies)
+        newBody = Body(0, combinedMass, newRadius, newColour, newName)
+        newBody.position = newPosition / combinedMass
+        newBody.velocity = newVelocity / combinedMass
+        return newBody
+
+def bodyTotals(bodies, potential):
+    kinetic = momentumX = momentumY = angularMomentum = momentumMagnitude = angularMomentumMagnitude = 0.0
+    for body in bodies:
+        position, velocity, mass = body.position, body.velocity, body.mass
+        px, py = velocity.x * mass, velocity.y * mass
+        cross = position.x * py - position.y * px
+        kinetic += 0.5 * (px * velocity.x + py * velocity.y)
+        momentumX += px
+        momentumY += py
+        angularMomentum += cross
+        momentumMagnitude += (px * px + py * py) ** 0.5
+        angularMomentumMagnitude += abs(cross)
+    return kinetic, potential, np.array([momentumX, momentumY]), angularMomentum, momentumMagnitude, angularMomentumMagnitude
+
+def accumulatePairForces(bodies, G):
+    potential = 0.0
+    for i, body in enumerate(bodies):
+        position, acceleration, mass = body.position, body.acceleration, body.mass
+        for other in bodies[i + 1:]:
+            otherPosition = other.position
+            dx = otherPosition.x - position.x
+            dy = otherPosition.y - position.y
+            distanceSquared = dx * dx + dy * dy
+            if distanceSquared == 0:
+                continue
+            inverse = distanceSquared ** -0.5
+            scale = G * inverse * inverse * inverse
+            acceleration.x += dx * scale * other.mass
+            acceleration.y += dy * scale * other.mass
+            otherAcceleration = other.acceleration
+            otherAcceleration.x -= dx * scale * mass
+            otherAcceleration.y -= dy * scale * mass
+            potential -= G * mass * other.mass * inverse
+    return potential
+
+def calculateOrbitalVelocity(center, body, G):
+    direction = body.position - center.position
+    distance = (direction.x ** 2 + direction.y ** 2) ** 0.5
+    if distance == 0:
+        return Vector2D(0, 0)
+    velocityMagnitude = (G * center.mass / distance) ** 0.5
+    velocityDirection = Vector2D(-direction.y, direction.x) / distance
+    return velocityDirection * velocityMagnitude
+
+def combineColours(colours):
+    red = sum(colour[0] for colour in colours) // len(colours)
+    green = sum(colour[1] for colour in colours) // len(colours)
+    blue = sum(colour[2] for colour in colours) // len(colours)
+    return (red, green, blue)
+
+def createSimulation(scenarioName=None, bodyCount=10000, seed=None, maxStepSize=3600):
+    sim = Simulation(3, 6.67430e-11, integrator="leapfrog", maxStepSize=maxStepSize)
+    if scenarioName in GENERATORS:
+        generator, keepBodies = GENERATORS[scenarioName]
+        sim.loadScenario(generator(bodyCount, G=sim.G, seed=seed), keepBodies)
+    elif scenarioName:
+        sim.loadScenario(loadScenarioFile(scenarioName))
+    if sim.bodyAmount > 5000:
+        sim.setForceSolver("barnesHut")
+    return sim
@@ -0,0 +1,89 @@
+import numpy as np
+
+MAX_CELLS_PER_AXIS = 1 << 20
+
+class SpatialGrid:
+    def __init__(self, positions, radii, masses, bodiesPerCell=4):
+        self.positions = positions
+        self.radii = radii
+        self.masses = masses
+        self.maxRadius = float(radii.max()) if len(radii) else 0.0
+        count = len(positions)
+        if count == 0:
+            self.origin = np.zeros(2)
+            self.cellSize = 1.0
+            self.shape = np.ones(2, dtype=np.int64)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.keys = np.zeros(0, dtype=np.int64)
+            return
+        self.origin = positions.min(axis=0)
+        extent = positions.max(axis=0) - self.origin
+        # Size cells from the bulk of the distribution so a few distant bodies don't make every cell huge.
+        low, high = np.percentile(positions, [1, 99], axis=0)
+        area = float(np.prod(np.maximum(high - low, 1e-300)))
+        cellSize = max(np.sqrt(area * bodiesPerCell / count), extent.max() / MAX_CELLS_PER_AXIS)
+        self.cellSize = float(cellSize) if cellSize > 1e-300 else max(float(extent.max()), 1.0)
+        cells = ((positions - self.origin) // self.cellSize).astype(np.int64)
+        self.shape = cells.max(axis=0) + 1
+        keys = cells[:, 1] * self.shape[0] + cells[:, 0]
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def queryRect(self, low, high):
+        low = np.asarray(low, dtype=float)
+        high = np.asarray(high, dtype=float)
+        firstCell = np.floor((low - self.origin) / self.cellSize)
+        lastCell = np.floor((high - self.origin) / self.cellSize)
+        if len(self.keys) == 0 or np.any(lastCell < 0) or np.any(firstCell >= self.shape):
+            return np.zeros(0, dtype=np.int64)
+        x0, y0 = np.maximum(firstCell, 0).astype(np.int64)
+        x1, y1 = np.minimum(lastCell, self.shape - 1).astype(np.int64)
+        rows = np.arange(y0, y1 + 1) * self.shape[0]
+        starts = np.searchsorted(self.keys, rows + x0, side="left")
+        counts = np.searchsorted(self.keys, rows + x1, side="right") - starts
+        offsets = np.cumsum(counts) - counts
+        candidates = self.order[np.repeat(starts - offsets, counts) + np.arange(counts.sum())]
+        inside = np.all((self.positions[candidates] >= low) & (self.positions[candidates] <= high), axis=1)
+        return candidates[inside]
+
+    def queryRadius(self, point, radius):
+        point = np.asarray(point, dtype=float)
+        candidates = self.queryRect(point - radius, point + radius)
+        offsets = self.positions[candidates] - point
+        return candidates[np.einsum("ij,ij->i", offsets, offsets) <= radius * radius]
+
+    def nearest(self, point, mask=None):
+        point = np.asarray(point, dtype=float)
+        if len(self.keys) == 0:
+            return None
+        corners = np.stack([self.origin, self.origin + self.shape * self.cellSize])
+        farthest = float(np.linalg.norm(np.abs(corners - point).max(axis=0)))
+        outside = np.maximum(np.maximum(corners[0] - point, point - corners[1]), 0)
+        radius = max(self.cellSize, float(outside.max()))
+        while True:
+            candidates = self.queryRect(point - radius, point + radius)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates):
+                distances = np.linalg.norm(self.positions[candidates] - point, axis=1)
+                best = int(np.argmin(distances))
+                # The square holds the whole circle of this radius, so nothing outside it can be closer.
+                if distances[best] <= radius:
+                    return int(candidates[best])
+                radius = float(distances[best])
+            elif radius >= farthest:
+                return None
+            else:
+                radius *= 2
+
+    def pick(self, point, tolerance):
+        point = np.asarray(point, dtype=float)
+        candidates = self.queryRadius(point, tolerance + self.maxRadius)
+        if len(candidates) == 0:
+            return None
+        gaps = np.linalg.norm(self.positions[candidates] - point, axis=1) - self.radii[candidates]
+        best = int(np.argmin(gaps))
+        return int(candidates[best]) if gaps[best] <= tolerance else None
+
+    def nearestHeavier(self, index):
+        return self.nearest(self.positions[index], self.masses > self.masses[index])
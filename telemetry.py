@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import os
+import stat
+import struct
+import threading
+import numpy as np
+
+MAGIC = b"PSIMTEL1"
+HEADER = struct.Struct("<8sQdI")
+BODY_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("position", "<f8", 2),
+    ("velocity", "<f8", 2),
+    ("mass", "<f8"),
+])
+
+def parseAddress(address):
+    kind, _, rest = address.partition(":")
+    if kind == "unix" and rest:
+        return "unix", rest, None
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return "tcp", host or "127.0.0.1", int(port)
+    raise ValueError(f"Unsupported telemetry address {address}, expected tcp:HOST:PORT or unix:PATH")
+
+def removeSocket(path):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"Refusing to replace {path}, it exists and is not a socket")
+    os.unlink(path)
+
+def encodeFrame(sequence, snapshot):
+    bodies = np.empty(len(snapshot.ids), dtype=BODY_DTYPE)
+    bodies["id"] = snapshot.ids
+    bodies["position"] = snapshot.positions
+    bodies["velocity"] = snapshot.velocities
+    bodies["mass"] = snapshot.masses
+    return HEADER.pack(MAGIC, sequence, snapshot.elapsedTime, len(bodies)) + bodies.tobytes()
+
+class TelemetryFrame:
+    def __init__(self, sequence, elapsedTime, bodies):
+        self.sequence = sequence
+        self.elapsedTime = elapsedTime
+        self.ids = bodies["id"]
+        self.positions = bodies["position"]
+        self.velocities = bodies["velocity"]
+        self.masses = bodies["mass"]
+
+def decodeFrame(header, payload):
+    magic, sequence, elapsedTime, count = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a telemetry stream")
+    return TelemetryFrame(sequence, elapsedTime, np.frombuffer(payload, dtype=BODY_DTYPE, count=count))
+
+class TelemetryClient:
+    def __init__(self, writer, queueSize):
+        self.writer = writer
+        self.frames = asyncio.Queue(queueSize)
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, data):
+        # Slow readers lose their oldest queued frame instead of holding up everyone else.
+        if self.frames.full():
+            self.frames.get_nowait()
+            self.dropped += 1
+        self.frames.put_nowait(data)
+
+    def disconnect(self):
+        self.writer.transport.abort()
+        self.offer(None)
+
+class TelemetryServer:
+    def __init__(self, source, address="tcp:127.0.0.1:8765", rate=30, queueSize=2):
+        self.source = source
+        self.address = parseAddress(address)
+        self.rate = rate
+        self.queueSize = queueSize
+        self.clients = set()
+        self.sequence = 0
+        self.loop = None
+        self.closing = None
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        if self.loop is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.closing.set)
+            self.thread.join()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except Exception as error:
+            self.error = error
+            self.ready.set()
+
+    def describe(self):
+        dropped = sum(client.dropped for client in list(self.clients))
+        kind, host, port = self.address
+        target = host if kind == "unix" else f"{host}:{port}"
+        return f"{kind}:{target}, {len(self.clients)} client(s), {dropped} dropped"
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.closing = asyncio.Event()
+        kind, host, port = self.address
+        if kind == "unix":
+            removeSocket(host)
+            server = await asyncio.start_unix_server(self.handleClient, host)
+        else:
+            server = await asyncio.start_server(self.handleClient, host, port)
+            self.address = (kind, host, server.sockets[0].getsockname()[1])
+        self.ready.set()
+        async with server:
+            await self.broadcast()
+            for client in list(self.clients):
+                client.disconnect()
+        if kind == "unix":
+            removeSocket(host)
+
+    async def broadcast(self):
+        interval = 1 / self.rate
+        published = None
+        while not self.closing.is_set():
+            snapshot = self.source()
+            if snapshot is not published and self.clients:
+                published = snapshot
+                data = encodeFrame(self.sequence, snapshot)
+                self.sequence += 1
+                for client in self.clients:
+                    client.offer(data)
+            try:
+                await asyncio.wait_for(self.closing.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def handleClient(self, reader, writer):
+        client = TelemetryClient(writer, self.queueSize)
+        self.clients.add(client)
+        try:
+            while True:
+                data = await client.frames.get()
+                if data is None:
+                    break
+                writer.write(data)
+                await writer.drain()
+                client.sent += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+async def openConnection(address):
+    kind, host, port = parseAddress(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(host)
+    return await asyncio.open_connection(host, port)
+
+async def readFrames(reader):
+    while True:
+        try:
+            header = await reader.readexactly(HEADER.size)
+        except asyncio.IncompleteReadError:
+            return
+        count = HEADER.unpack(header)[3]
+        payload = await reader.readexactly(count * BODY_DTYPE.itemsize)
+        yield decodeFrame(header, payload)
+
+async def watch(address, limit=None):
+    reader, writer = await openConnection(address)
+    previous = None
+    received = 0
+    async for frame in readFrames(reader):
+        skipped = 0 if previous is None else frame.sequence - previous - 1
+        previous = frame.sequence
+        centre = frame.masses @ frame.positions / frame.masses.sum()
+        print(f"frame {frame.sequence} t={frame.elapsedTime:.0f}s bodies={len(frame.ids)} "
+              f"centre of mass=({centre[0]:.3e}, {centre[1]:.3e}) skipped={skipped}")
+        received += 1
+        if limit is not None and received >= limit:
+            break
+    writer.close()
+
+def parseArguments():
+    parser = argparse.ArgumentParser(description="Print frames from a running simulation's telemetry stream")
+    parser.add_argument("address", help="tcp:HOST:PORT or unix:PATH")
+    parser.add_argument("--frames", type=int, default=None, help="stop after this many frames")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    try:
+        asyncio.run(watch(arguments.address, arguments.frames))
+    except KeyboardInterrupt:
+        pass
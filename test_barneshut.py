@@ -0,0 +1,28 @@
+import numpy as np
+from barneshut import barnesHutAccelerations, measureAccelerationError
+from kernels import directAccelerations
+
+G = 6.67430e-11
+
+def cloud(count, seed):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, 1e11, (count, 2)), rng.uniform(1e20, 1e24, count)
+
+def test_barnes_hut_error_shrinks_with_theta():
+    positions, masses = cloud(3000, 1)
+    errors = [measureAccelerationError(positions, masses, G, theta=theta) for theta in (0.8, 0.5, 0.3)]
+    assert errors[0]["rms"] > errors[1]["rms"] > errors[2]["rms"]
+    assert errors[1]["median"] < 2e-2
+    assert errors[2]["median"] < 5e-3
+
+def test_barnes_hut_matches_direct_sum_at_theta_zero():
+    positions, masses = cloud(500, 3)
+    expected = directAccelerations(positions, masses, G)
+    np.testing.assert_allclose(barnesHutAccelerations(positions, masses, G, theta=0.0), expected, rtol=1e-9)
+
+def test_barnes_hut_handles_coincident_and_single_bodies():
+    positions = np.array([[1.0, 2.0], [1.0, 2.0], [5e10, 0.0]])
+    masses = np.array([1e24, 1e24, 1e22])
+    accelerations = barnesHutAccelerations(positions, masses, G)
+    assert np.all(np.isfinite(accelerations))
+    assert np.all(barnesHutAccelerations(positions[:1], masses[:1], G) == 0)
@@ -0,0 +1,38 @@
+import numpy as np
+from collisions import findCollisionGroups, findEnsembleCollisionGroups
+
+def bruteForceGroups(positions, radii):
+    labels = list(range(len(positions)))
+    def root(index):
+        while labels[index] != index:
+            index = labels[index]
+        return index
+    touching = set()
+    for i in range(len(positions)):
+        for j in range(i + 1, len(positions)):
+            if np.linalg.norm(positions[i] - positions[j]) <= radii[i] + radii[j]:
+                labels[root(j)] = root(i)
+                touching.update((i, j))
+    groups = {}
+    for index in touching:
+        groups.setdefault(root(index), set()).add(index)
+    return {frozenset(group) for group in groups.values()}
+
+def test_collision_groups_match_brute_force():
+    rng = np.random.default_rng(2)
+    for count in (0, 1, 2, 50, 400):
+        positions = rng.uniform(0, 100, (count, 2))
+        radii = rng.uniform(0.5, 3, count)
+        groups = {frozenset(group.tolist()) for group in findCollisionGroups(positions, radii)}
+        assert groups == bruteForceGroups(positions, radii)
+
+def test_ensemble_groups_match_each_member():
+    rng = np.random.default_rng(3)
+    positions = rng.uniform(0, 100, (6, 80, 2))
+    radii = rng.uniform(0.5, 3, (6, 80))
+    alive = rng.random((6, 80)) > 0.2
+    found = {member: {frozenset(group.tolist()) for group in groups} for member, groups in findEnsembleCollisionGroups(positions, radii, alive)}
+    for member in range(6):
+        living = np.flatnonzero(alive[member])
+        expected = {frozenset(living[list(group)].tolist()) for group in bruteForceGroups(positions[member, living], radii[member, living])}
+        assert found.get(member, set()) == expected
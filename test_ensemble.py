@@ -0,0 +1,38 @@
+import numpy as np
+from ensemble import Ensemble
+from simulation import Simulation
+
+G = 6.67430e-11
+DAY = 24 * 60 * 60
+
+def test_reference_member_matches_a_leapfrog_simulation():
+    simulation = Simulation(3, G, vectorized=True, integrator="leapfrog")
+    ensemble = Ensemble.fromSimulation(simulation, 8, massJitter=1e-6, positionJitter=1e-9, seed=1)
+    for _ in range(100):
+        simulation.step(1.0)
+        ensemble.step(DAY)
+    assert ensemble.elapsedTime == simulation.elapsedTime
+    np.testing.assert_allclose(ensemble.positions[0], simulation.state.positions, rtol=1e-9, atol=1.0)
+    np.testing.assert_allclose(ensemble.velocities[0], simulation.state.velocities, rtol=1e-9, atol=1e-9)
+
+def test_perturbed_members_diverge_and_identical_ones_do_not():
+    simulation = Simulation(3, G, vectorized=True)
+    perturbed = Ensemble.fromSimulation(simulation, 4, positionJitter=1e-9, seed=2)
+    identical = Ensemble.fromSimulation(simulation, 4)
+    for _ in range(30):
+        perturbed.step(DAY)
+        identical.step(DAY)
+    rms, _ = perturbed.divergence()
+    assert rms[0] == 0 and np.all(rms[1:] > 0)
+    assert np.all(identical.divergence()[0] == 0)
+
+def test_merges_only_touch_the_colliding_member():
+    simulation = Simulation(3, G, vectorized=True)
+    ensemble = Ensemble.fromSimulation(simulation, 3)
+    ensemble.positions[1, 2] = ensemble.positions[1, 1]
+    ensemble.forcesStale = True
+    ensemble.step(60.0)
+    assert ensemble.merged.tolist() == [0, 1, 0]
+    assert ensemble.alive.sum(axis=1).tolist() == [10, 9, 10]
+    totalMasses = ensemble.masses.sum(axis=1)
+    np.testing.assert_allclose(totalMasses, totalMasses[0], rtol=1e-12)
@@ -0,0 +1,28 @@
+from simulation import Simulation
+
+G = 6.67430e-11
+
+def worstEnergyError(integrator, days=365):
+    simulation = Simulation(3, G, vectorized=True, integrator=integrator)
+    startEnergy = simulation.totalEnergy()
+    worst = 0.0
+    for _ in range(days):
+        simulation.step(1.0)
+        worst = max(worst, abs((simulation.totalEnergy() - startEnergy) / startEnergy))
+    assert simulation.elapsedTime == days * 24 * 60 * 60
+    return worst
+
+def test_block_time_steps_beat_leapfrog_on_energy():
+    assert worstEnergyError("block") < worstEnergyError("leapfrog") / 10
+
+def test_block_integrator_refused_above_direct_sum_sizes():
+    simulation = Simulation(3, G, vectorized=True, integrator="leapfrog")
+    simulation.loadScenario({
+        "positions": [[float(i), 0.0] for i in range(5001)], "velocities": [[0.0, 0.0]] * 5001,
+        "masses": [1.0] * 5001, "radii": [0.0] * 5001, "colours": [(0, 0, 0)] * 5001,
+    })
+    simulation.setIntegrator("block")
+    assert simulation.integrator.name == "leapfrog"
+
+def test_wisdom_holman_beats_leapfrog_on_energy():
+    assert worstEnergyError("wisdomHolman") < worstEnergyError("leapfrog") / 2
@@ -0,0 +1,46 @@
+import numpy as np
+from kepler import keplerDrift
+
+MU = 1.0
+
+def orbits():
+    # Circular, eccentric, near-parabolic and hyperbolic orbits, all starting at r = 1.
+    positions = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [1.0, 0.0], [-1.0, 0.0]])
+    velocities = np.array([[0.0, 1.0], [-0.7, 0.2], [0.0, 1.4142], [0.0, 2.0], [0.5, -1.5]])
+    return positions, velocities
+
+def invariants(positions, velocities):
+    energy = 0.5 * np.einsum("ij,ij->i", velocities, velocities) - MU / np.linalg.norm(positions, axis=1)
+    angularMomentum = positions[:, 0] * velocities[:, 1] - positions[:, 1] * velocities[:, 0]
+    return energy, angularMomentum
+
+def test_quarter_period_of_circular_orbit():
+    positions, velocities = keplerDrift(np.array([[1.0, 0.0]]), np.array([[0.0, 1.0]]), MU, np.pi / 2)
+    np.testing.assert_allclose(positions, [[0.0, 1.0]], atol=1e-12)
+    np.testing.assert_allclose(velocities, [[-1.0, 0.0]], atol=1e-12)
+
+def test_whole_periods_return_to_start():
+    # The near-parabolic orbit is left out: rounding in its very long period alone moves the end point.
+    positions, velocities = orbits()
+    for index in (0, 1):
+        axis = -MU / (2 * invariants(positions, velocities)[0][index])
+        period = 2 * np.pi * np.sqrt(axis ** 3 / MU)
+        end = keplerDrift(positions[index:index + 1], velocities[index:index + 1], MU, 3 * period)
+        np.testing.assert_allclose(end[0], positions[index:index + 1], atol=1e-9)
+        np.testing.assert_allclose(end[1], velocities[index:index + 1], atol=1e-9)
+
+def test_invariants_conserved_for_bound_and_unbound_orbits():
+    positions, velocities = orbits()
+    energy, angularMomentum = invariants(positions, velocities)
+    assert np.any(energy < 0) and np.any(energy > 0)
+    for deltaTime in (0.1, 2.7, 40.0):
+        newEnergy, newAngularMomentum = invariants(*keplerDrift(positions, velocities, MU, deltaTime))
+        np.testing.assert_allclose(newEnergy, energy, rtol=1e-9, atol=1e-10)
+        np.testing.assert_allclose(newAngularMomentum, angularMomentum, rtol=1e-9)
+
+def test_negative_time_step_reverses_the_drift():
+    positions, velocities = orbits()
+    forward = keplerDrift(positions, velocities, MU, 5.0)
+    backward = keplerDrift(*forward, MU, -5.0)
+    np.testing.assert_allclose(backward[0], positions, atol=1e-9)
+    np.testing.assert_allclose(backward[1], velocities, atol=1e-9)
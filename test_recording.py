@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from recording import ReplayPlayer, Trajectory
+from simulation import Simulation, Vector2D
+
+G = 6.67430e-11
+
+def recordRun(path, close=True):
+    simulation = Simulation(3, G, vectorized=True, integrator="leapfrog")
+    simulation.startRecording(str(path))
+    for index in range(40):
+        if index == 10:
+            simulation.bodies[2].position = simulation.bodies[1].position * 1.0
+            simulation.bodies[2].velocity = simulation.bodies[1].velocity * 1.0
+            simulation.forcesStale = True
+        simulation.step(0.5)
+    if close:
+        simulation.close()
+    else:
+        simulation.recorder.flush()
+    return simulation
+
+def checkReplay(trajectory, simulation):
+    rows = trajectory.rows(len(trajectory) - 1)
+    np.testing.assert_array_equal(rows["id"], simulation.state.ids)
+    np.testing.assert_array_equal(rows["position"], simulation.state.positions)
+    np.testing.assert_array_equal(rows["velocity"], simulation.state.velocities)
+    assert trajectory.endTime == simulation.elapsedTime
+    assert trajectory.mergedInto == simulation.mergedInto
+    assert {trajectory.names[bodyId] for bodyId in simulation.state.ids.tolist()} == set(simulation.state.names)
+
+def test_recording_round_trip(tmp_path):
+    simulation = recordRun(tmp_path / "run.trj")
+    trajectory = Trajectory(str(tmp_path / "run.trj"))
+    assert len(trajectory) == 41
+    assert len(set(simulation.mergedInto.values())) == 1
+    checkReplay(trajectory, simulation)
+
+def test_unclosed_recording_is_recovered(tmp_path):
+    simulation = recordRun(tmp_path / "run.trj", close=False)
+    trajectory = Trajectory(str(tmp_path / "run.trj"))
+    assert len(trajectory) == 41
+    checkReplay(trajectory, simulation)
+    simulation.recorder.file.close()
+
+def test_truncated_chunk_is_dropped(tmp_path):
+    path = tmp_path / "run.trj"
+    simulation = recordRun(path, close=False)
+    simulation.recorder.recordFrame(simulation, simulation.state)
+    simulation.recorder.flush()
+    simulation.recorder.file.close()
+    with open(path, "r+b") as file:
+        file.truncate(path.stat().st_size - 10)
+    assert len(Trajectory(str(path))) == 41
+
+def test_non_recording_is_rejected(tmp_path):
+    path = tmp_path / "other.trj"
+    path.write_bytes(b"not a trajectory at all")
+    with pytest.raises(ValueError):
+        Trajectory(str(path))
+
+def test_replay_seek_shows_the_frame_before_a_merge(tmp_path):
+    recordRun(tmp_path / "run.trj")
+    trajectory = Trajectory(str(tmp_path / "run.trj"))
+    counts = trajectory.frames["count"]
+    before = int(np.flatnonzero(counts[1:] < counts[:-1])[0])
+    player = ReplayPlayer(trajectory, Vector2D)
+    player.seek(float(trajectory.frames["time"][before]))
+    frame = player.frame()
+    assert frame.elapsedTime == trajectory.frames["time"][before]
+    assert len(frame.bodies) == counts[before]
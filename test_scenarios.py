@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scenarios import AU, G, SOLAR_MASS, asteroidBelt, loadCsv, loadNpz, loadScenarioFile, protoplanetaryDisk, saveNpz
+
+def test_csv_with_colours_and_names(tmp_path):
+    path = tmp_path / "bodies.csv"
+    path.write_text("x,y,vx,vy,mass,radius,r,g,b,name\n"
+                    "0,0,0,0,1.989e30,6.9e8,255,255,0,Sun\n"
+                    "1.5e11,0,0,29780,5.97e24,6.4e6,0,0,255,Earth\n")
+    scenario = loadCsv(str(path))
+    np.testing.assert_array_equal(scenario["positions"], [[0, 0], [1.5e11, 0]])
+    np.testing.assert_array_equal(scenario["velocities"], [[0, 0], [0, 29780]])
+    np.testing.assert_array_equal(scenario["colours"], [[255, 255, 0], [0, 0, 255]])
+    assert scenario["names"].tolist() == ["Sun", "Earth"]
+
+def test_csv_with_a_single_row_and_default_colours(tmp_path):
+    path = tmp_path / "one.csv"
+    path.write_text("x,y,vx,vy,mass,radius\n1,2,3,4,5,6\n")
+    scenario = loadScenarioFile(str(path))
+    np.testing.assert_array_equal(scenario["positions"], [[1, 2]])
+    np.testing.assert_array_equal(scenario["colours"], [[150, 150, 150]])
+    assert scenario["names"] is None
+
+def test_npz_round_trip(tmp_path):
+    original = protoplanetaryDisk(200, seed=4)
+    saveNpz(str(tmp_path / "disk.npz"), original)
+    loaded = loadNpz(str(tmp_path / "disk.npz"))
+    for field in ("positions", "velocities", "masses", "radii", "colours"):
+        np.testing.assert_array_equal(loaded[field], original[field])
+    assert loaded["names"].tolist() == original["names"].tolist()
+
+def test_unknown_extension_is_rejected():
+    with pytest.raises(ValueError):
+        loadScenarioFile("bodies.txt")
+
+def test_belt_orbits_are_near_circular_and_in_range():
+    belt = asteroidBelt(5000, seed=5)
+    distances = np.linalg.norm(belt["positions"], axis=1)
+    speeds = np.linalg.norm(belt["velocities"], axis=1)
+    assert distances.min() >= 2.2 * AU and distances.max() <= 3.3 * AU
+    np.testing.assert_allclose(speeds, np.sqrt(G * SOLAR_MASS / distances), rtol=0.1)
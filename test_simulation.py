@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from simulation import Simulation
+
+G = 6.67430e-11
+
+def stateOf(simulation):
+    positions = np.array([[body.position.x, body.position.y] for body in simulation.bodies])
+    velocities = np.array([[body.velocity.x, body.velocity.y] for body in simulation.bodies])
+    return positions, velocities
+
+def test_pairwise_matches_vectorized():
+    for integrator in ("euler", "leapfrog", "yoshida"):
+        pairwise = Simulation(3, G, integrator=integrator)
+        vectorized = Simulation(3, G, vectorized=True, integrator=integrator)
+        for _ in range(50):
+            pairwise.step(1.0)
+            vectorized.step(1.0)
+        positions, velocities = stateOf(pairwise)
+        expectedPositions, expectedVelocities = stateOf(vectorized)
+        np.testing.assert_allclose(positions, expectedPositions, rtol=1e-9, atol=1e-3)
+        np.testing.assert_allclose(velocities, expectedVelocities, rtol=1e-9, atol=1e-9)
+
+def test_body_views_refuse_in_place_edits():
+    simulation = Simulation(3, G, vectorized=True)
+    body = simulation.bodies[1]
+    body.position = body.position * 2.0
+    assert simulation.state.positions[1, 0] == body.position.x
+    with pytest.raises(AttributeError):
+        body.position.x = 0.0
+    with pytest.raises(AttributeError):
+        body.kick(1.0)
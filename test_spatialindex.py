@@ -0,0 +1,58 @@
+import numpy as np
+from spatialindex import SpatialGrid
+
+def population(count, seed):
+    rng = np.random.default_rng(seed)
+    # A dense core with a few far outliers, like a belt around a distant planet.
+    positions = np.concatenate([rng.normal(0, 10, (count - 5, 2)), rng.uniform(-1e4, 1e4, (5, 2))])
+    return positions, rng.uniform(0.01, 0.5, count), rng.uniform(1, 100, count)
+
+def test_query_rect_matches_brute_force():
+    positions, radii, masses = population(2000, 1)
+    grid = SpatialGrid(positions, radii, masses)
+    rng = np.random.default_rng(2)
+    for _ in range(50):
+        low = rng.uniform(-30, 30, 2)
+        high = low + rng.uniform(0, 20, 2)
+        expected = np.flatnonzero(np.all((positions >= low) & (positions <= high), axis=1))
+        np.testing.assert_array_equal(np.sort(grid.queryRect(low, high)), expected)
+
+def test_nearest_matches_brute_force():
+    positions, radii, masses = population(2000, 3)
+    grid = SpatialGrid(positions, radii, masses)
+    rng = np.random.default_rng(4)
+    for point in np.concatenate([rng.uniform(-40, 40, (40, 2)), rng.uniform(-2e4, 2e4, (10, 2))]):
+        distances = np.linalg.norm(positions - point, axis=1)
+        assert distances[grid.nearest(point)] == distances.min()
+        heavy = masses > 90
+        assert distances[grid.nearest(point, heavy)] == distances[heavy].min()
+
+def test_nearest_heavier_and_the_heaviest_body():
+    positions, radii, masses = population(500, 5)
+    grid = SpatialGrid(positions, radii, masses)
+    for index in range(0, 500, 37):
+        heavier = np.flatnonzero(masses > masses[index])
+        found = grid.nearestHeavier(index)
+        if len(heavier) == 0:
+            assert found is None
+        else:
+            distances = np.linalg.norm(positions[heavier] - positions[index], axis=1)
+            assert np.linalg.norm(positions[found] - positions[index]) == distances.min()
+    assert grid.nearestHeavier(int(np.argmax(masses))) is None
+
+def test_pick_matches_brute_force():
+    positions, radii, masses = population(2000, 6)
+    grid = SpatialGrid(positions, radii, masses)
+    rng = np.random.default_rng(7)
+    for point in rng.uniform(-30, 30, (100, 2)):
+        gaps = np.linalg.norm(positions - point, axis=1) - radii
+        expected = int(np.argmin(gaps)) if gaps.min() <= 0.2 else None
+        assert grid.pick(point, 0.2) == expected
+
+def test_degenerate_grids():
+    empty = SpatialGrid(np.zeros((0, 2)), np.zeros(0), np.zeros(0))
+    assert empty.nearest((0, 0)) is None and empty.pick((0, 0), 1.0) is None
+    single = SpatialGrid(np.array([[5.0, 5.0]]), np.array([1.0]), np.array([1.0]))
+    assert single.nearest((1e6, -1e6)) == 0
+    stacked = SpatialGrid(np.ones((10, 2)), np.ones(10), np.arange(10.0))
+    assert stacked.nearestHeavier(3) in range(4, 10)
@@ -0,0 +1,57 @@
+import asyncio
+import numpy as np
+import pytest
+from simulation import Simulation
+from telemetry import HEADER, TelemetryServer, decodeFrame, encodeFrame, openConnection, parseAddress, readFrames
+
+G = 6.67430e-11
+
+def test_frame_round_trip():
+    snapshot = Simulation(3, G, vectorized=True).snapshot()
+    data = encodeFrame(7, snapshot)
+    frame = decodeFrame(data[:HEADER.size], data[HEADER.size:])
+    assert frame.sequence == 7
+    assert frame.elapsedTime == snapshot.elapsedTime
+    np.testing.assert_array_equal(frame.ids, snapshot.ids)
+    np.testing.assert_array_equal(frame.positions, snapshot.positions)
+    np.testing.assert_array_equal(frame.velocities, snapshot.velocities)
+    np.testing.assert_array_equal(frame.masses, snapshot.masses)
+
+def test_foreign_stream_is_rejected():
+    with pytest.raises(ValueError):
+        decodeFrame(b"\0" * HEADER.size, b"")
+
+def test_addresses():
+    assert parseAddress("tcp:0.0.0.0:9000") == ("tcp", "0.0.0.0", 9000)
+    assert parseAddress("tcp::9000") == ("tcp", "127.0.0.1", 9000)
+    assert parseAddress("unix:/tmp/planets.sock") == ("unix", "/tmp/planets.sock", None)
+    with pytest.raises(ValueError):
+        parseAddress("udp:1.2.3.4:5")
+
+def test_unix_path_that_is_not_a_socket_is_kept(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me")
+    with pytest.raises(FileExistsError):
+        TelemetryServer(lambda: None, f"unix:{path}").start()
+    assert path.read_text() == "keep me"
+
+def test_server_streams_frames_over_tcp():
+    simulation = Simulation(3, G, vectorized=True)
+    server = TelemetryServer(simulation.snapshot, "tcp:127.0.0.1:0", rate=200).start()
+
+    async def receive():
+        reader, writer = await openConnection(f"tcp:127.0.0.1:{server.address[2]}")
+        frames = []
+        async for frame in readFrames(reader):
+            frames.append(frame)
+            if len(frames) == 3:
+                break
+        writer.close()
+        return frames
+
+    try:
+        frames = asyncio.run(asyncio.wait_for(receive(), 10))
+    finally:
+        server.stop()
+    assert [frame.sequence for frame in frames] == sorted(frame.sequence for frame in frames)
+    np.testing.assert_array_equal(frames[-1].ids, simulation.state.ids)
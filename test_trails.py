@@ -0,0 +1,42 @@
+import numpy as np
+from trails import OrbitTrail
+
+def points(start, stop):
+    return np.array([[float(i), -float(i)] for i in range(start, stop)])
+
+def test_trail_grows_until_its_limit():
+    trail = OrbitTrail(maxLength=100, initialCapacity=4)
+    for x, y in points(0, 70):
+        trail.append(x, y)
+    assert len(trail) == 70
+    assert len(trail.points) == 100
+    np.testing.assert_array_equal(trail.ordered(), points(0, 70))
+
+def test_trail_wraps_and_keeps_the_newest_points_in_order():
+    trail = OrbitTrail(maxLength=50, initialCapacity=8)
+    for x, y in points(0, 237):
+        trail.append(x, y)
+    assert len(trail) == 50
+    assert len(trail.points) == 50
+    np.testing.assert_array_equal(trail.ordered(), points(187, 237))
+    np.testing.assert_array_equal(trail.last(), points(236, 237)[0])
+
+def test_record_skips_points_closer_than_the_minimum():
+    trail = OrbitTrail()
+    for x in (0.0, 0.5, 2.0, 2.1, 4.0):
+        trail.record(x, 0.0, 1.0)
+    np.testing.assert_array_equal(trail.ordered()[:, 0], [0.0, 2.0, 4.0])
+    trail.clear()
+    assert len(trail) == 0 and len(trail.ordered()) == 0
+
+def test_decimated_samples_stay_put_as_the_trail_scrolls():
+    trail = OrbitTrail(maxLength=64)
+    for x, y in points(0, 200):
+        trail.append(x, y)
+    # Points sit sqrt(2) apart, so 8 pixels at unit scale keeps every fourth one.
+    before, stride = trail.decimated(scale=1.0, pixelSpacing=8)
+    assert stride == 4
+    trail.append(200.0, -200.0)
+    after, _ = trail.decimated(scale=1.0, pixelSpacing=8)
+    assert np.all(before[:, 0] % 4 == 0) and np.all(after[:, 0] % 4 == 0)
+    assert set(after[:, 0].tolist()) >= set(before[1:, 0].tolist())
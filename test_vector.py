@@ -0,0 +1,17 @@
+from simulation import Vector2D
+
+def test_in_place_operations_reuse_the_vector():
+    vector = Vector2D(1.0, 2.0)
+    same = vector.iadd(Vector2D(3.0, 4.0)).isub(Vector2D(1.0, 1.0)).imul(2.0).addScaled(Vector2D(1.0, -1.0), 0.5)
+    assert same is vector
+    assert vector.tuple() == (6.5, 9.5)
+
+def test_copy_is_independent():
+    vector = Vector2D(1.0, 2.0)
+    copied = vector.copy()
+    copied.set(5.0, 6.0)
+    assert vector.tuple() == (1.0, 2.0)
+    assert copied.tuple() == (5.0, 6.0)
+
+def test_vectors_have_no_instance_dict():
+    assert not hasattr(Vector2D(0.0, 0.0), "__dict__")
@@ -0,0 +1,81 @@
+import csv
+import time
+
+class NullMeasurement:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_MEASUREMENT = NullMeasurement()
+
+class Measurement:
+    def __init__(self, timer, phase):
+        self.timer = timer
+        self.phase = phase
+
+    def __enter__(self):
+        self.timer.stack.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        nested = self.timer.stack.pop()
+        self.timer.totals[self.phase] = self.timer.totals.get(self.phase, 0.0) + elapsed - nested
+        if self.timer.stack:
+            self.timer.stack[-1] += elapsed
+        return False
+
+class PhaseTimer:
+    def __init__(self, phases, smoothing=0.05):
+        self.phases = list(phases)
+        self.smoothing = smoothing
+        self.enabled = False
+        self.stack = []
+        self.totals = {}
+        self.averagesMs = {}
+        self.frames = 0
+        self.csvFile = None
+        self.csvWriter = None
+
+    def measure(self, phase):
+        if not self.enabled:
+            return NULL_MEASUREMENT
+        return Measurement(self, phase)
+
+    def setEnabled(self, enabled):
+        self.enabled = enabled
+        self.stack = []
+        self.totals = {}
+        if not enabled:
+            self.averagesMs = {}
+            self.stopCsv()
+
+    def endFrame(self):
+        if not self.enabled:
+            return
+        for phase in self.phases:
+            milliseconds = self.totals.get(phase, 0.0) * 1000
+            previous = self.averagesMs.get(phase)
+            self.averagesMs[phase] = milliseconds if previous is None else previous + (milliseconds - previous) * self.smoothing
+        if self.csvWriter is not None:
+            self.csvWriter.writerow([self.frames, f"{time.time():.6f}"] + [f"{self.totals.get(phase, 0.0) * 1000:.4f}" for phase in self.phases])
+        self.frames += 1
+        self.totals = {}
+
+    def averages(self):
+        return dict(self.averagesMs)
+
+    def startCsv(self, path):
+        self.stopCsv()
+        self.csvFile = open(path, "w", newline="")
+        self.csvWriter = csv.writer(self.csvFile)
+        self.csvWriter.writerow(["frame", "wallTime"] + [f"{phase}Ms" for phase in self.phases])
+
+    def stopCsv(self):
+        if self.csvFile is not None:
+            self.csvFile.close()
+        self.csvFile = None
+        self.csvWriter = None
@@ -0,0 +1,82 @@
+import math
+import numpy as np
+
+class OrbitTrail:
+    def __init__(self, maxLength=10000, initialCapacity=64):
+        self.maxLength = maxLength
+        self.points = np.empty((min(initialCapacity, maxLength), 2))
+        self.start = 0
+        self.count = 0
+        self.appended = 0
+        self.spacing = 0.0
+        self.projectionKey = None
+        self.projection = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+        self.appended = 0
+        self.spacing = 0.0
+        self.projectionKey = None
+
+    def last(self):
+        return self.points[(self.start + self.count - 1) % len(self.points)]
+
+    def record(self, x, y, minDistanceSquared):
+        if self.count:
+            lastX, lastY = self.last()
+            if (x - lastX)**2 + (y - lastY)**2 <= minDistanceSquared:
+                return
+        self.append(x, y)
+
+    def append(self, x, y):
+        if self.count:
+            lastX, lastY = self.last()
+            segment = math.hypot(x - lastX, y - lastY)
+            self.spacing = segment if self.count == 1 else self.spacing * 0.95 + segment * 0.05
+        if self.count == len(self.points) and len(self.points) < self.maxLength:
+            grown = np.empty((min(len(self.points) * 2, self.maxLength), 2))
+            grown[:self.count] = self.ordered()
+            self.points = grown
+            self.start = 0
+        index = (self.start + self.count) % len(self.points)
+        self.points[index] = (x, y)
+        if self.count < len(self.points):
+            self.count += 1
+        else:
+            self.start = (self.start + 1) % len(self.points)
+        self.appended += 1
+
+    def ordered(self):
+        end = self.start + self.count
+        if end <= len(self.points):
+            return self.points[self.start:end]
+        return np.concatenate([self.points[self.start:], self.points[:end - len(self.points)]])
+
+    def strideFor(self, scale, pixelSpacing):
+        pixelsPerPoint = self.spacing * scale
+        if pixelsPerPoint <= 0:
+            return 1
+        return 1 << max(0, int(math.log2(pixelSpacing / pixelsPerPoint)))
+
+    def decimated(self, scale, pixelSpacing=2):
+        stride = self.strideFor(scale, pixelSpacing)
+        points = self.ordered()
+        # Anchor the stride to the append counter so kept samples stay put as the trail scrolls.
+        firstSequence = self.appended - self.count
+        skip = (-firstSequence) % stride
+        return points[skip::stride], stride
+
+    def projected(self, offset, scale, current, pixelSpacing=2):
+        key = (self.appended, self.count, scale, offset.x, offset.y, current.x, current.y)
+        if key != self.projectionKey:
+            points, stride = self.decimated(scale, pixelSpacing)
+            screenPoints = np.empty((len(points) + 1, 2))
+            screenPoints[:-1] = (points + (offset.x, offset.y)) * scale
+            screenPoints[-1] = ((current.x + offset.x) * scale, (current.y + offset.y) * scale)
+            self.projection = screenPoints.tolist()
+            self.projectionKey = key
+        return self.projection